@@ -0,0 +1,406 @@
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import psutil
+
+from config_manager import ConfigManager
+from cpu_stat import CPUStatSampler
+from oled_display import OLED_AVAILABLE, PAGES, DisplayConfig, OLEDDisplay
+from perf import PERF, Histogram
+from sampler import MetricSampler
+from system_info import SystemInfo
+from system_monitor import SystemMonitor
+from thermal_sensors import ThermalRegistry
+from web_server import FLASK_AVAILABLE, WebServer
+
+if OLED_AVAILABLE:
+    from luma.oled.device import ssd1306
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_thresholds.json')
+
+
+class SyntheticProc:
+    """合成的 procfs/sysfs 目录（stat、meminfo、net/dev、温度传感器），advance() 推进计数"""
+
+    CORES = 4
+    INTERFACE = 'wlan0'
+
+    def __init__(self, root: str, seed: int = 1):
+        self.root = root
+        self.rng = random.Random(seed)
+        # 每核: user nice system idle iowait irq softirq steal
+        self.cores = [[0] * 8 for _ in range(self.CORES)]
+        self.net_sent = 0
+        self.net_recv = 0
+        self.cpu_freq = 1500.0
+
+        for directory in ('proc/net', 'sys/class/thermal/thermal_zone0', 'sys/class/hwmon/hwmon0'):
+            os.makedirs(self.path(directory), exist_ok=True)
+        self._write('sys/class/thermal/thermal_zone0/type', 'cpu-thermal\n')
+        self._write('sys/class/hwmon/hwmon0/name', 'rp1_adc\n')
+        self.advance()
+
+    def path(self, relative: str) -> str:
+        return os.path.join(self.root, relative)
+
+    def _write(self, relative: str, text: str):
+        # 原地覆盖写入，已打开的文件描述符（温度传感器）读到的是新内容
+        with open(self.path(relative), 'w') as f:
+            f.write(text)
+
+    def advance(self, seconds: float = 1.0):
+        """模拟经过 seconds 秒：CPU节拍、内存、网络计数和温度随机变化"""
+        rng = self.rng
+        ticks = int(100 * seconds)
+        for core in self.cores:
+            busy = int(ticks * rng.uniform(0.05, 0.95))
+            user = busy * 2 // 3
+            system = busy - user
+            iowait = rng.randint(0, max(0, (ticks - busy) // 10))
+            for i, value in ((0, user), (2, system), (3, ticks - busy - iowait), (4, iowait)):
+                core[i] += value
+        total = [sum(column) for column in zip(*self.cores)]
+        lines = ['cpu  ' + ' '.join(map(str, total)) + ' 0 0']
+        lines += [f'cpu{i} ' + ' '.join(map(str, core)) + ' 0 0' for i, core in enumerate(self.cores)]
+        lines.append('intr 0')
+        self._write('proc/stat', '\n'.join(lines) + '\n')
+
+        total_kb = 4 * 1024 * 1024
+        available_kb = int(total_kb * rng.uniform(0.2, 0.9))
+        self._write('proc/meminfo', ''.join(f'{key}: {value} kB\n' for key, value in (
+            ('MemTotal', total_kb), ('MemFree', available_kb // 2), ('MemAvailable', available_kb),
+            ('Buffers', 65536), ('Cached', available_kb // 3), ('SwapCached', 0),
+            ('Active', total_kb // 4), ('Inactive', total_kb // 8), ('SwapTotal', 0), ('SwapFree', 0),
+            ('Shmem', 16384), ('Slab', 32768), ('SReclaimable', 16384),
+        )))
+
+        self.net_sent += int(rng.uniform(0, 2 << 20) * seconds)
+        self.net_recv += int(rng.uniform(0, 8 << 20) * seconds)
+        self._write('proc/net/dev',
+                    'Inter-|   Receive                                                |  Transmit\n'
+                    ' face |bytes    packets errs drop fifo frame compressed multicast|'
+                    'bytes    packets errs drop fifo colls carrier compressed\n'
+                    f'    lo: 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0\n'
+                    f'{self.INTERFACE}: {self.net_recv} 0 0 0 0 0 0 0 {self.net_sent} 0 0 0 0 0 0 0\n')
+
+        self.cpu_freq = rng.choice((600.0, 1000.0, 1500.0, 1800.0))
+        self._write('sys/class/thermal/thermal_zone0/temp', f'{rng.randint(40000, 80000)}\n')
+        self._write('sys/class/hwmon/hwmon0/temp1_input', f'{rng.randint(35000, 60000)}\n')
+
+
+class SyntheticMonitor(SystemMonitor):
+    """从合成目录采集的 SystemMonitor：/proc/stat 与温度走原有解析路径，psutil 改读合成 procfs"""
+
+    def __init__(self, config_manager, proc: SyntheticProc):
+        super().__init__(config_manager)
+        self.proc = proc
+        psutil.PROCFS_PATH = proc.path('proc')
+        self.cpu_stat = CPUStatSampler(proc.path('proc/stat'))
+        self.thermal.close()
+        self.thermal = ThermalRegistry([], proc.path('sys/class'))
+
+    def get_network_info(self):
+        # 不启动 netlink 监听，身份按 network_info 间隔刷新
+        network_name, ip, interface = self.cached('network_info', self.read_network_info)
+        self.current_interface = interface
+        return network_name, ip, interface
+
+    def read_network_info(self):
+        return 'bench-wifi', '10.0.0.2', self.proc.INTERFACE
+
+    def read_cpu_freq(self) -> float:
+        return self.proc.cpu_freq
+
+
+class CaptureSerial:
+    """内存中的I2C接口，只统计写入的命令和数据字节"""
+
+    def __init__(self):
+        self.command_bytes = 0
+        self.data_bytes = 0
+
+    def command(self, *cmd):
+        self.command_bytes += len(cmd)
+
+    def data(self, data):
+        self.data_bytes += len(data)
+
+    def cleanup(self):
+        pass
+
+
+def attach_capture_device(display: OLEDDisplay) -> CaptureSerial:
+    """给屏幕接上内存中的 ssd1306，走完整的差分发送路径"""
+    serial = CaptureSerial()
+    display.serial = serial
+    display.device = ssd1306(serial, width=display.config.get('width', 128),
+                             height=display.config.get('height', 64), rotate=0)
+    display.is_connected = True
+    display.powered = True
+    # 不计入初始化时的清屏
+    serial.command_bytes = serial.data_bytes = 0
+    return serial
+
+
+def summarize(histogram: Histogram) -> dict:
+    """直方图摘要（毫秒）"""
+    data = histogram.to_dict()
+    for key in ('buckets_ms', 'counts'):
+        data.pop(key)
+    return data
+
+
+def span_summary(name: str) -> Optional[dict]:
+    histogram = PERF.histograms.get(name)
+    return summarize(histogram) if histogram else None
+
+
+def synthetic_snapshots(count: int, seed: int = 2) -> List[SystemInfo]:
+    """预先生成的快照序列，避免把数据生成算进渲染耗时"""
+    rng = random.Random(seed)
+    now = time.time()
+    snapshots = []
+    for i in range(count):
+        cores = tuple(round(rng.uniform(0, 100), 1) for _ in range(SyntheticProc.CORES))
+        snapshots.append(SystemInfo(
+            timestamp=now + i,
+            cpu_usage=sum(cores) / len(cores), cpu_cores=cores,
+            cpu_iowait=rng.uniform(0, 5), cpu_freq=rng.choice((600.0, 1500.0)),
+            mem_usage=rng.uniform(10, 90), mem_used=rng.randint(1, 3) << 30, mem_total=4 << 30,
+            cpu_temp=rng.uniform(40, 80), sensors=(('cpu-thermal', 'cpu', rng.uniform(40, 80)),),
+            network_name='bench-wifi', interface='wlan0', ip='10.0.0.2',
+            net_upload=rng.uniform(0, 2 << 20), net_download=rng.uniform(0, 8 << 20),
+        ))
+    return snapshots
+
+
+def bench_collect(monitor: SyntheticMonitor, iterations: int) -> dict:
+    """完整采集（清空TTL缓存）的耗时及各采集项耗时"""
+    PERF.reset()
+    for _ in range(iterations):
+        monitor.proc.advance()
+        monitor.cache.clear()
+        monitor.collect_system_info()
+    collectors = {name[len('collect.'):]: span_summary(name)
+                  for name in sorted(PERF.histograms) if name.startswith('collect.')}
+    return {'iterations': iterations, 'full': span_summary('collect'), 'collectors': collectors}
+
+
+def bench_render(config, frames: int) -> dict:
+    """每个页面连续渲染并同步发送 frames 帧"""
+    snapshots = synthetic_snapshots(64)
+    results = {}
+    for page in PAGES:
+        display = OLEDDisplay(DisplayConfig(config, {'page': page, 'name': f'bench-{page}'}))
+        serial = attach_capture_device(display)
+        # 第一帧包含静态层构建和整屏发送，单独计算
+        display.draw_display(snapshots[0])
+        first_bytes = display.bytes_sent
+        serial.command_bytes = serial.data_bytes = 0
+
+        PERF.reset()
+        start = time.perf_counter()
+        for i in range(frames):
+            display.draw_display(snapshots[(i + 1) % len(snapshots)])
+        elapsed = time.perf_counter() - start
+
+        stats = display.get_stats()
+        results[page] = {
+            'frames': frames,
+            'fps': round(frames / elapsed, 1),
+            'render': span_summary('display.render'),
+            'flush': span_summary('display.flush'),
+            'first_frame_bytes': first_bytes,
+            'bytes_per_frame': round((stats['bytes_sent'] - first_bytes) / frames, 1),
+            'bus_bytes_per_frame': round((serial.command_bytes + serial.data_bytes) / frames, 1),
+            'unchanged_frames': stats['frames_unchanged'],
+        }
+    return results
+
+
+def _client(port: int, deadline: float, histogram: Histogram, counters: Dict[str, int], lock: threading.Lock):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    requests = errors = 0
+    local = Histogram()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', '/api/status')
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            continue
+        local.observe(time.perf_counter() - start)
+        requests += 1
+    conn.close()
+    with lock:
+        counters['requests'] += requests
+        counters['errors'] += errors
+        for i, count in enumerate(local.counts):
+            histogram.counts[i] += count
+        histogram.count += local.count
+        histogram.total += local.total
+        histogram.max = max(histogram.max, local.max)
+
+
+def bench_status(config, monitor: SyntheticMonitor, clients: int, duration: float, server_mode: str) -> dict:
+    """多个客户端并发请求 /api/status 的吞吐和延迟（pooled 为生产服务器，dev 为 Flask 开发服务器）"""
+    from werkzeug.serving import make_server
+
+    # 不输出每个请求的访问日志
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    sampler = MetricSampler(config, monitor)
+    sampler.start()
+    web = WebServer(config, monitor, None, sampler)
+    if server_mode == 'pooled':
+        server = web.make_server('127.0.0.1', 0)
+    else:
+        server = make_server('127.0.0.1', 0, web.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    try:
+        while sampler.latest() is None:
+            time.sleep(0.05)
+
+        histogram = Histogram()
+        counters = {'requests': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=_client, args=(server.server_port, deadline, histogram, counters, lock))
+                   for _ in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        sampler.stop()
+
+    return {
+        'server': server_mode,
+        'clients': clients,
+        'duration': round(elapsed, 2),
+        'requests': counters['requests'],
+        'errors': counters['errors'],
+        'requests_per_second': round(counters['requests'] / elapsed, 1),
+        'latency': summarize(histogram),
+    }
+
+
+def lookup(results: dict, key: str):
+    """按点号路径取结果中的数值"""
+    value = results
+    for part in key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def check_thresholds(results: dict, thresholds: Dict[str, dict]) -> List[str]:
+    """返回超出阈值的项；结果中不存在的项（被跳过的阶段）不检查"""
+    failures = []
+    for key, limits in thresholds.items():
+        value = lookup(results, key)
+        if value is None:
+            continue
+        if 'min' in limits and value < limits['min']:
+            failures.append(f"{key} = {value} < {limits['min']}")
+        if 'max' in limits and value > limits['max']:
+            failures.append(f"{key} = {value} > {limits['max']}")
+    return failures
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix='oled-bench-')
+    try:
+        config = ConfigManager(os.path.join(workdir, 'config.json'))
+        proc = SyntheticProc(os.path.join(workdir, 'root'))
+        monitor = SyntheticMonitor(config, proc)
+        PERF.configure(True)
+
+        results = {
+            'meta': {
+                'timestamp': time.time(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpu_count': os.cpu_count(),
+            },
+        }
+        stages = args.only or ['collect', 'render', 'api']
+        if 'collect' in stages:
+            print("采集耗时测试...", file=sys.stderr)
+            results['collect'] = bench_collect(monitor, args.iterations)
+        if 'render' in stages:
+            if OLED_AVAILABLE:
+                print("渲染测试...", file=sys.stderr)
+                results['render'] = bench_render(config, args.frames)
+            else:
+                print("OLED库未安装，跳过渲染测试", file=sys.stderr)
+        if 'api' in stages:
+            if FLASK_AVAILABLE:
+                print("/api/status 吞吐测试...", file=sys.stderr)
+                results['api_status'] = bench_status(config, monitor, args.clients, args.duration, args.server)
+            else:
+                print("Flask未安装，跳过接口测试", file=sys.stderr)
+        monitor.close()
+        return results
+    finally:
+        PERF.configure(False)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无屏幕基准测试：合成数据源 + 内存显示设备")
+    parser.add_argument('--frames', type=int, default=500, help="每个页面渲染的帧数")
+    parser.add_argument('--iterations', type=int, default=500, help="完整采集次数")
+    parser.add_argument('--clients', type=int, default=8, help="/api/status 并发客户端数")
+    parser.add_argument('--duration', type=float, default=5.0, help="接口测试时长（秒）")
+    parser.add_argument('--server', choices=['pooled', 'dev'], default='pooled',
+                        help="接口测试使用的服务器：生产线程池(pooled)或Flask开发服务器(dev)")
+    parser.add_argument('--only', action='append', choices=['collect', 'render', 'api'], help="只运行指定阶段")
+    parser.add_argument('--output', help="结果JSON输出文件（默认输出到标准输出）")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help="回归阈值文件")
+    parser.add_argument('--no-check', action='store_true', help="不检查阈值")
+    args = parser.parse_args()
+
+    # 各模块的日志输出到标准错误，标准输出只留给结果JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+    if not args.no_check and os.path.exists(args.thresholds):
+        with open(args.thresholds, 'r') as f:
+            thresholds = json.load(f)
+        results['failures'] = check_thresholds(results, thresholds)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for failure in results.get('failures', []):
+        print(f"性能回归: {failure}", file=sys.stderr)
+    sys.exit(1 if results.get('failures') else 0)
+
+
+if __name__ == "__main__":
+    main()
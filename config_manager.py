@@ -1,14 +1,55 @@
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from collections import namedtuple
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+_MISSING = object()
+
+
+class Settings:
+    """只读的类型化配置对象：嵌套字典转为属性访问，如 settings.web_server.workers"""
+    
+    def __init__(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            object.__setattr__(self, key, Settings(value) if isinstance(value, dict) else value)
+    
+    def __setattr__(self, key, value):
+        raise AttributeError("配置对象只读，请通过 ConfigManager.update_config 修改")
+    
+    def __repr__(self):
+        return f"Settings({self.__dict__!r})"
+
+
+# 一次编译的结果：raw 为合并后的原始配置，settings 为属性访问对象，flat 为 点分键 -> 值
+CompiledConfig = namedtuple('CompiledConfig', ['raw', 'settings', 'flat'])
+
 
 class ConfigManager:
+    """配置管理：每次变化时编译成只读配置并整体替换，读取无锁且为O(1)，变化的键通知给订阅者"""
+    
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
         self.default_config = self._get_default_config()
-        self.config = self.default_config.copy()
+        self.lock = threading.RLock()
+        # 已提示过的无效配置项 -> 原始值，同一个值只提示一次
+        self.invalid: Dict[str, Any] = {}
+        # (键前缀, 回调)；键前缀匹配自身及其下所有键
+        self.subscribers: List[Tuple[Tuple[str, ...], Callable[[Set[str]], None]]] = []
+        self.compiled = self._compile(copy.deepcopy(self.default_config))
         self.load_config()
     
+    @property
+    def config(self) -> Dict[str, Any]:
+        """合并后的原始配置（只读，修改请使用 update_config/set）"""
+        return self.compiled.raw
+    
+    @property
+    def settings(self) -> Settings:
+        """类型化的配置对象"""
+        return self.compiled.settings
+    
     def _get_default_config(self) -> Dict[str, Any]:
         return {
             "i2c_port": 1,
@@ -19,9 +60,25 @@ class ConfigManager:
             "height": 64,
             "display_rows": 5,
             "row_spacing": 2,
+            "show_cpu_detail": False,
             "web_port": 8080,
             "web_enabled": True,
             
+            # Web服务：有界工作线程池 + 长连接；production 为 false 时使用 Flask 开发服务器
+            "web_server": {
+                "production": True,
+                "workers": 4,
+                "max_streams": 4,
+                "max_connections": 64,
+                "keepalive_timeout": 15.0,
+                "request_timeout": 10.0,
+                "worker_nice": 5
+            },
+            
+            # 多屏配置：每项可覆盖 i2c_port/oled_address/width/height/display_rows/row_spacing，
+            # 并用 page 选择页面(overview/cpu/network)；为空时使用上面的单屏配置
+            "displays": [],
+            
             "display_settings": {
                 "enabled": True,
                 "start_hour": 10,
@@ -34,7 +91,7 @@ class ConfigManager:
                 "network_speed_threshold": 100.0,
                 "memory_usage_threshold": 30.0,
                 "cpu_freq_threshold": 1000.0,
-                "check_interval": 10
+                "check_interval": 1.0
             },
             
             "sleep_settings": {
@@ -43,6 +100,37 @@ class ConfigManager:
                 "end_hour": 6
             },
             
+            "refresh_intervals": {
+                "cpu": 1.0,
+                "network_speed": 1.0,
+                "memory": 2.0,
+                "cpu_freq": 5.0,
+                "temperature": 5.0,
+                "network_info": 30.0
+            },
+            
+            "history": {
+                "enabled": True,
+                "persist": True,
+                "file": "history.dat",
+                "flush_interval": 60
+            },
+            
+            "fleet": {
+                "enabled": False,
+                "nodes": [],
+                "interval": 3.0,
+                "timeout": 2.0,
+                "max_backoff": 60.0,
+                "concurrency": 64
+            },
+            
+            # 热路径插桩，关闭时几乎无开销；log_interval 为日志汇总间隔（秒，0为不输出）
+            "perf": {
+                "enabled": False,
+                "log_interval": 300
+            },
+            
             "temperature_paths": [
                 "/sys/class/thermal/thermal_zone0/temp",
                 "/sys/class/hwmon/hwmon0/temp1_input",
@@ -50,13 +138,98 @@ class ConfigManager:
             ]
         }
     
+    def _report_invalid(self, path: str, value, message: str):
+        """无效值只在首次出现或原始值变化时提示"""
+        if self.invalid.get(path, _MISSING) != value:
+            self.invalid[path] = copy.deepcopy(value)
+            print(message)
+    
+    def _coerce(self, value, default, path: str):
+        """按默认值的类型校验并转换，类型不符时使用默认值"""
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                self._report_invalid(path, value, f"配置项 {path} 应为对象，使用默认值")
+                value = default
+            else:
+                self.invalid.pop(path, None)
+            return {key: self._coerce(item, default[key], f"{path}.{key}" if path else key) if key in default else item
+                    for key, item in value.items()}
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, int):
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        elif isinstance(default, float):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if valid:
+                value = float(value)
+        elif isinstance(default, (str, list)):
+            valid = isinstance(value, type(default))
+        else:
+            valid = True
+        if not valid:
+            self._report_invalid(path, value, f"配置项 {path} 的值 {value!r} 类型无效，使用默认值 {default!r}")
+            return copy.deepcopy(default)
+        self.invalid.pop(path, None)
+        return value
+    
+    def _compile(self, raw: Dict[str, Any]) -> CompiledConfig:
+        """生成类型化配置与点分键索引"""
+        typed = self._coerce(raw, self.default_config, '')
+        flat: Dict[str, Any] = {}
+        
+        def flatten(values: Dict[str, Any], prefix: str):
+            for key, value in values.items():
+                flat[prefix + key] = value
+                if isinstance(value, dict):
+                    flatten(value, f"{prefix}{key}.")
+        
+        flatten(typed, '')
+        return CompiledConfig(raw, Settings(typed), flat)
+    
+    def _apply(self, raw: Dict[str, Any]) -> Set[str]:
+        """编译新配置并整体替换，通知订阅者，返回变化的键"""
+        with self.lock:
+            old, new = self.compiled, self._compile(raw)
+            self.compiled = new
+            changed = {key for key in old.flat.keys() | new.flat.keys()
+                       if not isinstance(new.flat.get(key), dict) and not isinstance(old.flat.get(key), dict)
+                       and old.flat.get(key, _MISSING) != new.flat.get(key, _MISSING)}
+            if changed:
+                self._notify(changed)
+            return changed
+    
+    def _notify(self, changed: Set[str]):
+        for prefixes, callback in list(self.subscribers):
+            keys = {key for key in changed
+                    if any(key == prefix or key.startswith(prefix + '.') for prefix in prefixes)}
+            if not keys:
+                continue
+            try:
+                callback(keys)
+            except Exception as e:
+                print(f"配置变更回调执行失败: {e}")
+    
+    def subscribe(self, callback: Callable[[Set[str]], None], *prefixes: str):
+        """订阅配置变化：prefixes 下任一键变化时以变化的键集合调用 callback"""
+        with self.lock:
+            self.subscribers.append((prefixes, callback))
+    
+    def _read_file(self) -> Dict[str, Any]:
+        with open(self.config_file, 'r') as f:
+            loaded_config = json.load(f)
+        if not isinstance(loaded_config, dict):
+            raise ValueError("配置文件顶层应为对象")
+        config = copy.deepcopy(self.default_config)
+        self._deep_update(config, loaded_config)
+        return config
+    
     def load_config(self) -> bool:
         """从文件加载配置"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
-                    self._deep_update(self.config, loaded_config)
+                self._apply(self._read_file())
                 print("配置加载成功")
                 return True
             else:
@@ -67,6 +240,23 @@ class ConfigManager:
             print(f"配置加载错误: {e}，使用默认配置")
             return False
     
+    def reload(self) -> Set[str]:
+        """配置文件被外部修改后重新加载，内容无效时保留当前配置"""
+        try:
+            config = self._read_file()
+            # 本进程保存配置也会触发文件事件，内容相同时不重新编译
+            if config == self.config:
+                return set()
+            changed = self._apply(config)
+        except FileNotFoundError:
+            return set()
+        except Exception as e:
+            print(f"配置重新加载失败，保留当前配置: {e}")
+            return set()
+        if changed:
+            print(f"配置已重新加载: {', '.join(sorted(changed))}")
+        return changed
+    
     def save_config(self) -> bool:
         """保存配置到文件"""
         try:
@@ -81,8 +271,11 @@ class ConfigManager:
     def update_config(self, new_config: Dict[str, Any]) -> bool:
         """更新配置"""
         try:
-            self._deep_update(self.config, new_config)
-            return self.save_config()
+            with self.lock:
+                config = copy.deepcopy(self.config)
+                self._deep_update(config, new_config)
+                self._apply(config)
+                return self.save_config()
         except Exception as e:
             print(f"配置更新错误: {e}")
             return False
@@ -96,22 +289,18 @@ class ConfigManager:
                 original[key] = value
     
     def get(self, key: str, default=None):
-        """获取配置值"""
-        keys = key.split('.')
-        value = self.config
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        """获取配置值（查预先生成的点分键索引）"""
+        return self.compiled.flat.get(key, default)
     
     def set(self, key: str, value):
         """设置配置值"""
         keys = key.split('.')
-        config = self.config
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        config[keys[-1]] = value
\ No newline at end of file
+        with self.lock:
+            config = copy.deepcopy(self.config)
+            node = config
+            for k in keys[:-1]:
+                if k not in node:
+                    node[k] = {}
+                node = node[k]
+            node[keys[-1]] = value
+            self._apply(config)
@@ -0,0 +1,124 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from typing import Optional
+
+# inotify 事件（linux/inotify.h）：写入完成、改名移入、新建
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+# inotify_event 头部: wd, mask, cookie, len
+_EVENT = struct.Struct('iIII')
+
+# 编辑器保存往往连续产生多个事件，合并这段时间内的事件后再加载
+SETTLE_DELAY = 0.2
+
+
+class ConfigWatcher:
+    """监听配置文件变化并重新加载（inotify 监听所在目录，不可用时定期比较修改时间）"""
+
+    def __init__(self, config_manager, poll_interval: float = 2.0):
+        self.config = config_manager
+        self.poll_interval = poll_interval
+        self.mode = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动监听线程"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        fd = self._open_inotify()
+        if fd is not None:
+            self.mode = 'inotify'
+            target = self._run_inotify
+            args = (fd,)
+        else:
+            self.mode = 'poll'
+            target = self._run_poll
+            args = ()
+        self.thread = threading.Thread(target=target, args=args, name="config-watcher", daemon=True)
+        self.thread.start()
+
+    def _open_inotify(self) -> Optional[int]:
+        """监听配置文件所在目录，改名替换文件的保存方式也能收到事件"""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            print(f"inotify不可用，改为检测配置文件修改时间: {e}")
+            return None
+        if fd < 0:
+            print(f"inotify不可用，改为检测配置文件修改时间: {os.strerror(ctypes.get_errno())}")
+            return None
+        directory = os.path.dirname(os.path.abspath(self.config.config_file))
+        wd = libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        if wd < 0:
+            print(f"无法监听配置目录 {directory}: {os.strerror(ctypes.get_errno())}")
+            os.close(fd)
+            return None
+        return fd
+
+    def _read_events(self, fd: int) -> bool:
+        """读出所有待处理事件，返回其中是否有配置文件"""
+        name = os.fsencode(os.path.basename(self.config.config_file))
+        matched = False
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except BlockingIOError:
+                return matched
+            if not data:
+                return matched
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                _, _, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                if data[offset:offset + length].rstrip(b'\0') == name:
+                    matched = True
+                offset += length
+
+    def _run_inotify(self, fd: int):
+        try:
+            while self.running:
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable or not self._read_events(fd):
+                    continue
+                if self._stop_event.wait(SETTLE_DELAY):
+                    break
+                self._read_events(fd)
+                self.config.reload()
+        except OSError as e:
+            print(f"配置文件监听失败: {e}")
+        finally:
+            os.close(fd)
+
+    def _stat(self):
+        try:
+            st = os.stat(self.config.config_file)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _run_poll(self):
+        """回退方案：定期比较修改时间和大小"""
+        last = self._stat()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._stat()
+            if current != last:
+                last = current
+                self.config.reload()
+
+    def stop(self):
+        """停止监听线程"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional
+
+import psutil
+
+# /proc/stat 各列: user nice system idle iowait irq softirq steal guest guest_nice
+# guest 时间已计入 user/nice，只取前8列计算总量
+_STAT_FIELDS = 8
+_IDLE, _IOWAIT, _SOFTIRQ, _STEAL = 3, 4, 6, 7
+
+
+class CPUStatSampler:
+    """基于 /proc/stat 计数差值的非阻塞CPU使用率采样"""
+
+    def __init__(self, stat_path: str = "/proc/stat"):
+        self.stat_path = stat_path
+        self.prev_total: Optional[List[int]] = None
+        self.prev_cores: List[List[int]] = []
+        self.available = True
+
+    def read_counters(self):
+        """读取总体及每核的累计计数"""
+        total = None
+        cores = []
+        with open(self.stat_path, 'r') as f:
+            for line in f:
+                if not line.startswith('cpu'):
+                    break
+                parts = line.split()
+                values = [int(v) for v in parts[1:_STAT_FIELDS + 1]]
+                values += [0] * (_STAT_FIELDS - len(values))
+                if parts[0] == 'cpu':
+                    total = values
+                else:
+                    cores.append(values)
+        return total, cores
+
+    @staticmethod
+    def _breakdown(prev: Optional[List[int]], cur: List[int]) -> Dict[str, float]:
+        """根据两次计数计算各项占比（首次采样使用开机以来的平均值）"""
+        if prev is None or len(prev) != len(cur):
+            delta = cur
+        else:
+            delta = [max(0, c - p) for c, p in zip(cur, prev)]
+        total = sum(delta)
+        if total <= 0:
+            return {'usage': 0.0, 'iowait': 0.0, 'steal': 0.0, 'softirq': 0.0}
+        busy = total - delta[_IDLE] - delta[_IOWAIT]
+        return {
+            'usage': busy * 100.0 / total,
+            'iowait': delta[_IOWAIT] * 100.0 / total,
+            'steal': delta[_STEAL] * 100.0 / total,
+            'softirq': delta[_SOFTIRQ] * 100.0 / total,
+        }
+
+    def sample(self) -> Dict[str, object]:
+        """计算自上次调用以来的CPU占用，不做任何等待"""
+        if self.available:
+            try:
+                total, cores = self.read_counters()
+                if total is not None:
+                    return self._sample_from_counters(total, cores)
+            except (OSError, ValueError) as e:
+                print(f"读取 {self.stat_path} 失败，改用psutil: {e}")
+            self.available = False
+
+        # 非Linux环境回退：psutil 以上次调用为基准，interval=None 不阻塞
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+        return {
+            'cpu_usage': sum(per_core) / len(per_core) if per_core else 0.0,
+            'cpu_cores': tuple(round(v, 1) for v in per_core),
+            'cpu_iowait': 0.0,
+            'cpu_steal': 0.0,
+            'cpu_softirq': 0.0,
+        }
+
+    def _sample_from_counters(self, total: List[int], cores: List[List[int]]) -> Dict[str, object]:
+        overall = self._breakdown(self.prev_total, total)
+        prev_cores = self.prev_cores if len(self.prev_cores) == len(cores) else [None] * len(cores)
+        per_core = tuple(round(self._breakdown(p, c)['usage'], 1) for p, c in zip(prev_cores, cores))
+
+        self.prev_total = total
+        self.prev_cores = cores
+
+        return {
+            'cpu_usage': overall['usage'],
+            'cpu_cores': per_core,
+            'cpu_iowait': overall['iowait'],
+            'cpu_steal': overall['steal'],
+            'cpu_softirq': overall['softirq'],
+        }
@@ -0,0 +1,111 @@
+import threading
+from typing import Dict, List, Set
+
+from display_writer import DisplayWriter
+from oled_display import DisplayConfig, OLEDDisplay
+from system_info import SystemInfo
+
+# 影响屏幕尺寸和布局的配置，变化后在下一帧重算
+LAYOUT_KEYS = ('width', 'height', 'display_rows', 'row_spacing')
+# 决定屏幕组成和总线分配的配置，变化后需要重启
+RESTART_KEYS = ('displays', 'i2c_port', 'oled_address')
+
+
+class DisplayManager:
+    """多屏管理：按 displays 配置创建屏幕，同一总线共用一个写入线程，所有屏幕渲染同一份快照"""
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.writers: Dict[int, DisplayWriter] = {}
+        self.displays: List[OLEDDisplay] = []
+
+        # 未配置 displays 时沿用顶层的 i2c_port/oled_address 作为唯一屏幕
+        definitions = self.config.get('displays') or [{}]
+        seen = set()
+        for definition in definitions:
+            view = DisplayConfig(self.config, definition)
+            port = view.get('i2c_port', 1)
+            address = view.get('oled_address', 60)
+            if (port, address) in seen:
+                print(f"重复的屏幕定义 I2C-{port} 0x{address:02x}，已忽略")
+                continue
+            seen.add((port, address))
+
+            writer = self.writers.get(port)
+            if writer is None:
+                writer = DisplayWriter(f"display-writer-i2c{port}")
+                self.writers[port] = writer
+            self.displays.append(OLEDDisplay(view, writer))
+
+        # 配置变化由其他线程通知，记下变化的键，在主循环绘制前应用
+        self.pending_changes: Set[str] = set()
+        self.pending_lock = threading.Lock()
+        self.config.subscribe(self.on_config_change, *LAYOUT_KEYS, *RESTART_KEYS)
+
+    def on_config_change(self, changed: Set[str]):
+        """配置变更回调"""
+        with self.pending_lock:
+            self.pending_changes |= changed
+
+    def apply_config_changes(self):
+        """应用待处理的配置变化，屏幕定义中覆盖了的键不受全局配置影响"""
+        with self.pending_lock:
+            changed, self.pending_changes = self.pending_changes, set()
+        if not changed:
+            return
+        restart = sorted(key for key in changed if key.split('.')[0] in RESTART_KEYS)
+        if restart:
+            print(f"屏幕配置 {', '.join(restart)} 已修改，重启后生效")
+        for display in self.displays:
+            keys = {key for key in changed if key not in display.config.overrides}
+            if keys:
+                display.apply_config(keys)
+
+    @property
+    def is_connected(self) -> bool:
+        """任一屏幕在线"""
+        return any(display.is_connected for display in self.displays)
+
+    @property
+    def powered(self) -> bool:
+        """任一屏幕处于显示开启状态"""
+        return any(display.powered for display in self.displays)
+
+    def start(self):
+        """启动各总线的写入线程"""
+        for writer in self.writers.values():
+            writer.start()
+
+    def ensure_connected(self):
+        """各屏幕独立探测/重连"""
+        for display in self.displays:
+            display.ensure_connected()
+
+    def power_on(self):
+        for display in self.displays:
+            display.power_on()
+
+    def power_off(self):
+        for display in self.displays:
+            display.power_off()
+
+    def draw(self, system_info: SystemInfo):
+        """用同一份快照渲染所有在线屏幕，传输交给各自总线的写入线程"""
+        self.apply_config_changes()
+        for display in self.displays:
+            if display.is_connected and display.device:
+                display.draw_display(system_info)
+
+    def get_stats(self) -> List[dict]:
+        """各屏幕的传输统计"""
+        return [display.get_stats() for display in self.displays]
+
+    def stop(self):
+        """停止写入线程"""
+        for writer in self.writers.values():
+            writer.stop()
+
+    def cleanup(self):
+        """清屏并释放所有屏幕"""
+        for display in self.displays:
+            display.cleanup()
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class DisplayWriter:
+    """一条I2C总线的写入线程：每个屏幕一个单槽邮箱，只保留最新一帧，总线阻塞时丢弃过期帧"""
+
+    def __init__(self, name: str = "display-writer"):
+        self.name = name
+        # 屏幕 -> 待发送的最新一帧（屏幕对象需提供 write_frame(image) -> bool）
+        self.pending: Dict[object, object] = {}
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._cond = threading.Condition()
+
+        self.frames_submitted = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def start(self):
+        """启动写入线程"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def submit(self, display, image):
+        """投递一帧（不阻塞），该屏幕未发送的旧帧直接被覆盖"""
+        with self._cond:
+            if display in self.pending:
+                self.frames_dropped += 1
+            self.pending[display] = image
+            self.frames_submitted += 1
+            self._cond.notify()
+
+    def discard(self, display):
+        """丢弃该屏幕尚未发送的帧（关屏前调用）"""
+        with self._cond:
+            self.pending.pop(display, None)
+
+    def _run(self):
+        """写入循环"""
+        while True:
+            with self._cond:
+                while self.running and not self.pending:
+                    self._cond.wait()
+                if not self.running:
+                    break
+                frames, self.pending = self.pending, {}
+
+            for display, image in frames.items():
+                start = time.perf_counter()
+                try:
+                    written = display.write_frame(image)
+                except Exception as e:
+                    print(f"屏幕写入失败: {e}")
+                    written = False
+                if not written:
+                    continue
+
+                latency = time.perf_counter() - start
+                self.frames_written += 1
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                self.total_latency += latency
+
+    def get_stats(self) -> dict:
+        """写入统计（延迟单位毫秒）"""
+        written = self.frames_written
+        return {
+            'frames_submitted': self.frames_submitted,
+            'frames_written': written,
+            'frames_dropped': self.frames_dropped,
+            'last_latency_ms': round(self.last_latency * 1000, 3),
+            'avg_latency_ms': round(self.total_latency / written * 1000, 3) if written else 0.0,
+            'max_latency_ms': round(self.max_latency * 1000, 3),
+        }
+
+    def stop(self):
+        """停止写入线程，未发送的帧直接丢弃"""
+        with self._cond:
+            self.running = False
+            self.pending = {}
+            self._cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
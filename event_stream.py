@@ -0,0 +1,102 @@
+import threading
+from typing import Callable, Iterator, Optional
+
+
+class SnapshotBroadcaster:
+    """快照推送中心：每个采样周期只序列化一次，所有SSE客户端共享同一份数据"""
+
+    HEARTBEAT_INTERVAL = 15.0
+
+    def __init__(self, build_payload: Callable[[object], bytes]):
+        # build_payload 返回快照序列化后的JSON（UTF-8，不含换行）
+        self.build_payload = build_payload
+        self.snapshot = None
+        self.event_seq = -1
+        self.event: Optional[bytes] = None
+        self.clients = 0
+        self.closed = False
+        # 每次 disconnect_all 加一，订阅时的代数与当前不同的事件流结束
+        self.generation = 0
+        self._cond = threading.Condition()
+
+    def on_snapshot(self, snapshot):
+        """采样器回调：有订阅者时序列化一次并唤醒所有客户端"""
+        self.snapshot = snapshot
+        if self.clients > 0:
+            self._publish(snapshot)
+
+    def _publish(self, snapshot):
+        event = b"id: %d\ndata: %s\n\n" % (snapshot.seq, self.build_payload(snapshot))
+        with self._cond:
+            if snapshot.seq > self.event_seq:
+                self.event_seq = snapshot.seq
+                self.event = event
+                self._cond.notify_all()
+
+    def subscribe(self, limit: Optional[int] = None) -> Optional["_Subscription"]:
+        """占用一个事件流名额（已达 limit 时返回None），返回的事件流先发送当前快照，之后每个新快照推送一次"""
+        with self._cond:
+            if limit is not None and self.clients >= limit:
+                return None
+            self.clients += 1
+            return _Subscription(self, self.generation)
+
+    def _stream(self, generation: int, subscription: "_Subscription") -> Iterator[bytes]:
+        try:
+            # 无订阅者期间不序列化，首个客户端连接时补发最新快照
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot.seq > self.event_seq:
+                self._publish(snapshot)
+
+            last_seq = -1
+            while not self.closed and self.generation == generation:
+                with self._cond:
+                    if self.event_seq == last_seq:
+                        self._cond.wait(self.HEARTBEAT_INTERVAL)
+                    if self.closed or self.generation != generation:
+                        break
+                    if self.event_seq == last_seq:
+                        event = None
+                    else:
+                        last_seq, event = self.event_seq, self.event
+                # 超时无新数据时发送注释行保持连接
+                yield event if event is not None else b": keepalive\n\n"
+        finally:
+            subscription.release()
+
+    def disconnect_all(self):
+        """结束当前所有事件流，之后的订阅不受影响（重建服务器前调用）"""
+        with self._cond:
+            self.generation += 1
+            self._cond.notify_all()
+
+    def close(self):
+        """关闭所有事件流"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class _Subscription:
+    """已占用名额的事件流：迭代结束或响应关闭时释放名额，未开始迭代就被关闭也会释放"""
+
+    def __init__(self, broadcaster: SnapshotBroadcaster, generation: int):
+        self.broadcaster = broadcaster
+        self.released = False
+        self.events = broadcaster._stream(generation, self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self.events)
+
+    def close(self):
+        self.events.close()
+        self.release()
+
+    def release(self):
+        with self.broadcaster._cond:
+            if not self.released:
+                self.released = True
+                self.broadcaster.clients -= 1
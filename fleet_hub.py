@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 汇总页面只保留的状态字段，避免为数百个节点转发完整快照
+FLEET_FIELDS = (
+    'timestamp', 'uptime', 'cpu_usage', 'cpu_freq', 'cpu_temp', 'mem_usage',
+    'mem_used', 'mem_total', 'network_name', 'ip', 'net_upload', 'net_download', 'oled_connected',
+)
+
+
+class _Node:
+    """一个被汇总的节点及其长连接"""
+
+    def __init__(self, name: str, host: str, port: int):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.status: Optional[dict] = None
+        self.online = False
+        self.last_seen = 0.0
+        self.latency = 0.0
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'address': self.address,
+            'online': self.online,
+            'last_seen': self.last_seen or None,
+            'latency_ms': round(self.latency * 1000, 1),
+            'failures': self.failures,
+            'error': self.error,
+            'status': self.status,
+        }
+
+
+def parse_node(entry) -> Tuple[str, str, int]:
+    """节点配置: "host:port" 或 {"name": ..., "host": ..., "port": ...}"""
+    if isinstance(entry, dict):
+        host = entry['host']
+        port = int(entry.get('port', 8080))
+        return entry.get('name') or f"{host}:{port}", host, port
+    host, _, port = str(entry).rpartition(':')
+    if not host:
+        host, port = port, '8080'
+    return f"{host}:{port}", host, int(port)
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    """按 Content-Length 或分块编码读取响应体"""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await reader.readline()
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length']))
+    return await reader.read()
+
+
+async def http_get_json(node: _Node, path: str) -> dict:
+    """在节点的长连接上发送 GET，服务器要求关闭时下次请求再重连"""
+    if node.writer is None or node.writer.is_closing():
+        node.reader, node.writer = await asyncio.open_connection(node.host, node.port)
+
+    node.writer.write(f"GET {path} HTTP/1.1\r\nHost: {node.address}\r\n"
+                      f"Connection: keep-alive\r\nAccept: application/json\r\n\r\n".encode())
+    await node.writer.drain()
+
+    status_line = await node.reader.readline()
+    if not status_line:
+        raise ConnectionError("连接已被关闭")
+    version, status, _ = status_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await node.reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+
+    body = await _read_body(node.reader, headers)
+    connection = headers.get('connection', '').lower()
+    if connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive'):
+        node.close()
+    if status != '200':
+        raise ConnectionError(f"HTTP {status}")
+    return json.loads(body)
+
+
+class FleetHub:
+    """集群汇总：用asyncio并发拉取各节点状态，长连接复用，单节点超时与指数退避"""
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.nodes: List[_Node] = []
+        for entry in self.config.get('fleet.nodes', []):
+            try:
+                self.nodes.append(_Node(*parse_node(entry)))
+            except (KeyError, ValueError) as e:
+                print(f"忽略无效的节点配置 {entry}: {e}")
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._stop: Optional[asyncio.Event] = None
+        # 每轮拉取后生成一次汇总JSON，所有请求共享
+        self.body = json.dumps({'nodes': [], 'summary': {'total': 0, 'online': 0}})
+        self.rounds = 0
+
+    def start(self):
+        """在独立线程中运行事件循环"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run_loop, name="fleet-hub", daemon=True)
+        self.thread.start()
+        print(f"集群汇总已启动，节点数: {len(self.nodes)}")
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._poll_forever())
+        finally:
+            for node in self.nodes:
+                node.close()
+            self.loop.close()
+
+    async def _poll_forever(self):
+        self._stop = asyncio.Event()
+        semaphore = asyncio.Semaphore(int(self.config.get('fleet.concurrency', 64)))
+        while self.running:
+            started = time.monotonic()
+            due = [node for node in self.nodes if started >= node.next_attempt]
+            await asyncio.gather(*(self._poll_node(node, semaphore) for node in due))
+            self._publish()
+
+            interval = float(self.config.get('fleet.interval', 3.0))
+            try:
+                await asyncio.wait_for(self._stop.wait(), max(0.0, interval - (time.monotonic() - started)))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_node(self, node: _Node, semaphore: asyncio.Semaphore):
+        """拉取单个节点，失败时断开连接并按退避推迟下一次尝试"""
+        timeout = float(self.config.get('fleet.timeout', 2.0))
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                data = await asyncio.wait_for(http_get_json(node, '/api/status'), timeout)
+            except Exception as e:
+                node.close()
+                node.online = False
+                node.failures += 1
+                node.error = str(e) or type(e).__name__
+                base = float(self.config.get('fleet.interval', 3.0))
+                delay = min(float(self.config.get('fleet.max_backoff', 60.0)), base * 2 ** node.failures)
+                # 加入抖动，避免大量节点同时恢复时集中重连
+                node.next_attempt = time.monotonic() + delay * random.uniform(0.8, 1.2)
+                return
+
+            node.latency = time.monotonic() - start
+            node.status = {key: data.get(key) for key in FLEET_FIELDS}
+            node.online = True
+            node.failures = 0
+            node.error = None
+            node.last_seen = time.time()
+            node.next_attempt = 0.0
+
+    def _publish(self):
+        """生成汇总数据"""
+        nodes = [node.to_dict() for node in self.nodes]
+        self.body = json.dumps({
+            'nodes': nodes,
+            'summary': {'total': len(nodes), 'online': sum(1 for n in nodes if n['online'])},
+            'updated': time.time(),
+        })
+        self.rounds += 1
+
+    def stop(self):
+        """停止事件循环并关闭所有连接"""
+        if not self.running:
+            return
+        self.running = False
+        if self.loop and self._stop:
+            self.loop.call_soon_threadsafe(self._stop.set)
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+
+async def _serve_stand_in(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, index: int):
+    """本地替身节点：返回合成的 /api/status，支持长连接"""
+    started = time.time()
+    try:
+        while True:
+            request = await reader.readuntil(b'\r\n\r\n')
+            path = request.split(b' ', 2)[1]
+            if path == b'/api/status':
+                now = time.time()
+                body = json.dumps({
+                    'timestamp': now, 'uptime': now - started,
+                    'cpu_usage': random.uniform(0, 100), 'cpu_freq': 1500.0,
+                    'cpu_temp': random.uniform(40, 70), 'mem_usage': random.uniform(10, 90),
+                    'mem_used': 1 << 30, 'mem_total': 4 << 30,
+                    'network_name': 'eth0', 'ip': f"127.0.0.{index % 250 + 1}",
+                    'net_upload': random.uniform(0, 1 << 20), 'net_download': random.uniform(0, 1 << 20),
+                    'oled_connected': False,
+                }).encode()
+                head = f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            else:
+                body = b''
+                head = "HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+            writer.write(head.encode() + body)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_stand_ins(count: int, base_port: int):
+    """启动 count 个替身节点，端口从 base_port 起递增"""
+    servers = []
+    for i in range(count):
+        servers.append(await asyncio.start_server(
+            lambda r, w, i=i: _serve_stand_in(r, w, i), '127.0.0.1', base_port + i))
+    print(f"已启动 {count} 个替身节点: 127.0.0.1:{base_port} ~ 127.0.0.1:{base_port + count - 1}")
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动本地替身节点，用于测试集群汇总")
+    parser.add_argument('--count', type=int, default=10, help="替身节点数量")
+    parser.add_argument('--port', type=int, default=9100, help="起始端口")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_stand_ins(args.count, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import math
+import threading
+import time
+from typing import Optional
+
+
+class FrameScheduler:
+    """单调时钟上的帧调度：截止时间对齐到墙上时钟的 interval 整数倍，超时后跳过错过的帧而不补发"""
+
+    def __init__(self, interval: float = 1.0, align: bool = True):
+        self.interval = interval
+        self.align = align
+        # 上一帧的截止时间（单调时钟）
+        self.deadline: Optional[float] = None
+
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+
+    def reset(self):
+        """暂停调度后（睡眠、非显示时段）重新对齐，不计为超时"""
+        self.deadline = None
+
+    def _next_deadline(self, now: float) -> float:
+        """计算 now 之后的下一个截止时间"""
+        interval = self.interval
+        if self.align:
+            wall = time.time()
+            target = (math.floor(wall / interval) + 1) * interval
+            deadline = now + (target - wall)
+        else:
+            deadline = now + interval
+        # 墙上时钟与单调时钟的微小偏差不能导致同一帧触发两次
+        if self.deadline is not None:
+            deadline = max(deadline, self.deadline + interval / 2)
+        return deadline
+
+    def wait(self, stop_event: threading.Event) -> bool:
+        """等待下一帧截止时间，stop_event 被设置时返回 False"""
+        now = time.monotonic()
+        if self.deadline is not None and now > self.deadline + self.interval:
+            # 上一帧的工作超过了一个周期：记录超时，直接对齐到下一个截止时间
+            self.overruns += 1
+            self.missed_ticks += int((now - self.deadline) // self.interval)
+        self.deadline = self._next_deadline(now)
+
+        if stop_event.wait(max(0.0, self.deadline - now)):
+            return False
+
+        lateness = max(0.0, time.monotonic() - self.deadline)
+        self.ticks += 1
+        self.last_lateness = lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        return True
+
+    def get_stats(self) -> dict:
+        """调度统计（延迟单位毫秒）"""
+        return {
+            'interval': self.interval,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'missed_ticks': self.missed_ticks,
+            'last_lateness_ms': round(self.last_lateness * 1000, 3),
+            'max_lateness_ms': round(self.max_lateness * 1000, 3),
+        }
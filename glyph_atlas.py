@@ -0,0 +1,52 @@
+import string
+from typing import Dict, Tuple
+
+from PIL import Image, ImageDraw
+
+# 预先光栅化的常用字符（其余字符首次出现时再光栅化并缓存）
+PRELOAD_CHARS = string.digits + string.ascii_letters + string.punctuation + ' °'
+
+
+class GlyphAtlas:
+    """单个字体的1位字形缓存，逐字贴图代替每帧的FreeType光栅化"""
+
+    def __init__(self, font, preload: str = PRELOAD_CHARS):
+        self.font = font
+        # 字符 -> (掩码图像或None, x偏移, y偏移, 步进宽度)
+        self.glyphs: Dict[str, Tuple[object, int, int, float]] = {}
+        for ch in preload:
+            self.glyph(ch)
+
+    def glyph(self, ch: str):
+        """获取字形，未缓存时光栅化一次"""
+        cached = self.glyphs.get(ch)
+        if cached is not None:
+            return cached
+
+        left, top, right, bottom = self.font.getbbox(ch)
+        advance = self.font.getlength(ch)
+        if right <= left or bottom <= top:
+            # 空白字符只有步进宽度
+            cached = (None, 0, 0, advance)
+        else:
+            mask = Image.new('1', (right - left, bottom - top))
+            ImageDraw.Draw(mask).text((-left, -top), ch, fill=1, font=self.font)
+            cached = (mask, left, top, advance)
+        self.glyphs[ch] = cached
+        return cached
+
+    def text_width(self, text: str) -> int:
+        """文本宽度（按字形步进累加）"""
+        return int(round(sum(self.glyph(ch)[3] for ch in text)))
+
+    def draw(self, image, xy: Tuple[int, int], text: str, limit: int = None):
+        """将文本逐字贴到图像上，limit 为右侧裁剪边界"""
+        x, y = xy
+        pen = float(x)
+        for ch in text:
+            mask, left, top, advance = self.glyph(ch)
+            if limit is not None and pen + advance > limit:
+                break
+            if mask is not None:
+                image.paste(1, (int(round(pen)) + left, y + top), mask)
+            pen += advance
@@ -0,0 +1,256 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+# 文件布局:
+#   [0, HEADER_SIZE)   文件头 + 各分区描述与提交索引 + 指标名称表
+#   [HEADER_SIZE, ...) 每个历史层一个分区，分区内为定长记录组成的环形区
+MAGIC = b'OLEDHIST'
+VERSION = 2
+HEADER_SIZE = 4096
+METRIC_SLOTS = 32
+NAME_SIZE = 32
+MAX_SECTIONS = 8
+
+# magic, version, metric_slots, section_count
+_HEADER = struct.Struct('<8sIII')
+# 分区描述: step, capacity, values_per_slot, record_size
+_SECTION = struct.Struct('<IIII')
+_SECTION_OFFSET = 32
+# 提交索引: head, count, last_seq, crc —— 仅在记录区落盘后更新
+_INDEX = struct.Struct('<IIQI')
+_INDEX_BODY = struct.Struct('<IIQ')
+_INDEX_OFFSET = _SECTION_OFFSET + MAX_SECTIONS * _SECTION.size
+_NAMES_OFFSET = 512
+# 记录头: seq, timestamp；记录尾: crc
+_RECORD_HEAD = struct.Struct('<Qd')
+_CRC = struct.Struct('<I')
+
+
+class _Section:
+    """一个历史层在文件中的环形分区"""
+
+    def __init__(self, offset: int, step: int, capacity: int, values_per_slot: int):
+        self.offset = offset
+        self.step = step
+        self.capacity = capacity
+        self.values_per_slot = values_per_slot
+        self.values = struct.Struct(f'<{METRIC_SLOTS * values_per_slot}f')
+        self.record_size = _RECORD_HEAD.size + self.values.size + _CRC.size
+        self.head = 0
+        self.count = 0
+        self.last_seq = 0
+
+    @property
+    def size(self) -> int:
+        return self.capacity * self.record_size
+
+    def record_offset(self, pos: int) -> int:
+        return self.offset + pos * self.record_size
+
+
+class HistoryStore:
+    """基于mmap的定长环形历史文件，按层保存定长二进制记录，批量刷盘，断电后可恢复"""
+
+    def __init__(self, path: str, tiers: Sequence[Tuple[int, int]], flush_interval: float = 60.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.fd: Optional[int] = None
+        self.mm: Optional[mmap.mmap] = None
+        self.names: List[str] = []
+        self.last_flush = time.monotonic()
+        self.dirty = False
+        self.skipped_records = 0
+
+        # 第0层只保存平均值，汇总层保存 avg/min/max
+        self.sections: List[_Section] = []
+        offset = HEADER_SIZE
+        for i, (step, capacity) in enumerate(tiers[:MAX_SECTIONS]):
+            section = _Section(offset, step, capacity, 1 if i == 0 else 3)
+            self.sections.append(section)
+            offset += section.size
+        self.file_size = offset
+
+    def open(self) -> bool:
+        """映射历史文件，文件不匹配时重新创建"""
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fresh = os.fstat(self.fd).st_size != self.file_size
+            if fresh:
+                self._preallocate()
+            self.mm = mmap.mmap(self.fd, self.file_size)
+            if fresh or not self._load_header():
+                self._format()
+            else:
+                for i, section in enumerate(self.sections):
+                    self._recover(i, section)
+            print(f"历史文件已映射: {self.path}, 记录数: {[s.count for s in self.sections]}")
+            return True
+        except Exception as e:
+            print(f"历史文件打开失败: {e}")
+            self.close()
+            return False
+
+    def _preallocate(self):
+        """预分配固定大小的文件，避免运行中扩展文件"""
+        os.ftruncate(self.fd, 0)
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self.fd, 0, self.file_size)
+                return
+            except OSError:
+                pass
+        os.ftruncate(self.fd, self.file_size)
+
+    def _format(self):
+        """初始化文件头和空索引"""
+        self.mm[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _HEADER.pack_into(self.mm, 0, MAGIC, VERSION, METRIC_SLOTS, len(self.sections))
+        for i, section in enumerate(self.sections):
+            _SECTION.pack_into(self.mm, _SECTION_OFFSET + i * _SECTION.size, section.step,
+                               section.capacity, section.values_per_slot, section.record_size)
+            section.head = section.count = section.last_seq = 0
+            self._write_index(i, section)
+        self.names = []
+        self.mm.flush()
+
+    def _load_header(self) -> bool:
+        """校验文件头、分区布局并读取指标名称表"""
+        magic, version, slots, section_count = _HEADER.unpack_from(self.mm, 0)
+        if (magic, version, slots, section_count) != (MAGIC, VERSION, METRIC_SLOTS, len(self.sections)):
+            print("历史文件格式不匹配，重新创建")
+            return False
+        for i, section in enumerate(self.sections):
+            layout = _SECTION.unpack_from(self.mm, _SECTION_OFFSET + i * _SECTION.size)
+            if layout != (section.step, section.capacity, section.values_per_slot, section.record_size):
+                print("历史文件分层配置已变化，重新创建")
+                return False
+
+        self.names = []
+        for i in range(METRIC_SLOTS):
+            offset = _NAMES_OFFSET + i * NAME_SIZE
+            raw = bytes(self.mm[offset:offset + NAME_SIZE]).rstrip(b'\0')
+            if not raw:
+                break
+            self.names.append(raw.decode('utf-8', 'replace'))
+        return True
+
+    def _write_index(self, index: int, section: _Section):
+        body = _INDEX_BODY.pack(section.head, section.count, section.last_seq)
+        _INDEX.pack_into(self.mm, _INDEX_OFFSET + index * _INDEX.size,
+                         section.head, section.count, section.last_seq, zlib.crc32(body))
+
+    def _recover(self, index: int, section: _Section):
+        """从提交索引恢复，并向前扫描索引之后已落盘的完整记录"""
+        head, count, last_seq, crc = _INDEX.unpack_from(self.mm, _INDEX_OFFSET + index * _INDEX.size)
+        if zlib.crc32(_INDEX_BODY.pack(head, count, last_seq)) != crc or head >= section.capacity:
+            print(f"历史索引损坏，丢弃第{index}层记录")
+            head = count = last_seq = 0
+        section.head, section.count, section.last_seq = head, min(count, section.capacity), last_seq
+
+        # 索引提交后写入的记录可能已被内核回写，逐条校验直到遇到撕裂记录
+        while True:
+            record = self._read_slot(section, section.head)
+            if record is None or record[0] != section.last_seq + 1:
+                break
+            section.last_seq = record[0]
+            section.head = (section.head + 1) % section.capacity
+            section.count = min(section.count + 1, section.capacity)
+
+    def _read_slot(self, section: _Section, pos: int) -> Optional[Tuple[int, float, tuple]]:
+        """读取并校验一条记录，CRC不符（撕裂写入）返回None"""
+        offset = section.record_offset(pos)
+        seq, timestamp = _RECORD_HEAD.unpack_from(self.mm, offset)
+        if seq == 0:
+            return None
+        crc_offset = offset + section.record_size - _CRC.size
+        if zlib.crc32(self.mm[offset:crc_offset]) != _CRC.unpack_from(self.mm, crc_offset)[0]:
+            return None
+        values = section.values.unpack_from(self.mm, offset + _RECORD_HEAD.size)
+        return seq, timestamp, values
+
+    def set_name(self, slot: int, name: str):
+        """登记指标名称（槽位与内存历史的指标序号一致）"""
+        with self.lock:
+            if self.mm is None or slot >= METRIC_SLOTS:
+                return
+            offset = _NAMES_OFFSET + slot * NAME_SIZE
+            self.mm[offset:offset + NAME_SIZE] = name.encode('utf-8')[:NAME_SIZE].ljust(NAME_SIZE, b'\0')
+            while len(self.names) <= slot:
+                self.names.append('')
+            self.names[slot] = name
+            self.dirty = True
+
+    def append(self, index: int, timestamp: float, values: Sequence[float]):
+        """向指定层追加一条记录，按 flush_interval 批量刷盘"""
+        with self.lock:
+            if self.mm is None:
+                return
+            section = self.sections[index]
+            section.last_seq += 1
+            offset = section.record_offset(section.head)
+            _RECORD_HEAD.pack_into(self.mm, offset, section.last_seq, timestamp)
+            section.values.pack_into(self.mm, offset + _RECORD_HEAD.size, *values)
+            crc_offset = offset + section.record_size - _CRC.size
+            _CRC.pack_into(self.mm, crc_offset, zlib.crc32(self.mm[offset:crc_offset]))
+
+            section.head = (section.head + 1) % section.capacity
+            section.count = min(section.count + 1, section.capacity)
+            self.dirty = True
+
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        """先落盘记录区，再提交索引"""
+        if not self.dirty:
+            return
+        try:
+            self.mm.flush()
+            for i, section in enumerate(self.sections):
+                self._write_index(i, section)
+            self.mm.flush(0, mmap.PAGESIZE)
+        except OSError as e:
+            print(f"历史文件刷盘失败: {e}")
+        self.dirty = False
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        """立即刷盘"""
+        with self.lock:
+            if self.mm is not None:
+                self._flush()
+
+    def records(self, index: int) -> List[Tuple[float, tuple]]:
+        """按时间顺序返回某层的有效记录，跳过撕裂或损坏的记录"""
+        with self.lock:
+            if self.mm is None:
+                return []
+            section = self.sections[index]
+            first = (section.head - section.count) % section.capacity
+            rows = []
+            for i in range(section.count):
+                record = self._read_slot(section, (first + i) % section.capacity)
+                if record is None:
+                    self.skipped_records += 1
+                    continue
+                rows.append((record[1], record[2]))
+            return rows
+
+    def close(self):
+        """刷盘并解除映射"""
+        with self.lock:
+            if self.mm is not None:
+                self._flush()
+                self.mm.close()
+                self.mm = None
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
@@ -40,7 +40,7 @@ fi
 
 # 复制文件到安装目录
 echo "复制程序文件..."
-cp -f oled_monitor.py config_manager.py system_monitor.py oled_display.py web_server.py $INSTALL_DIR/
+cp -f oled_monitor.py config_manager.py system_monitor.py network_watcher.py thermal_sensors.py oled_display.py glyph_atlas.py display_writer.py display_manager.py sampler.py frame_scheduler.py wake_detector.py system_info.py cpu_stat.py config_watcher.py metric_history.py history_store.py event_stream.py snapshot_trace.py perf.py metrics_exporter.py fleet_hub.py static_assets.py status_cache.py wsgi_server.py web_server.py $INSTALL_DIR/
 cp -f requirements-system.txt $INSTALL_DIR/
 
 # 复制配置文件
@@ -0,0 +1,232 @@
+import math
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+NAN = float('nan')
+
+
+class _Tier:
+    """单个分辨率层：按固定步长聚合，数据保存在定长环形数组中"""
+
+    def __init__(self, step: int, capacity: int, keep_range: bool):
+        self.step = step
+        self.capacity = capacity
+        self.keep_range = keep_range
+        self.head = 0          # 下一个写入位置
+        self.count = 0         # 已写入的有效点数
+        self.times = array('d', [NAN]) * capacity
+        self.avg: List[array] = []
+        self.min: List[array] = []
+        self.max: List[array] = []
+        # 当前未完成的桶
+        self.bucket = None
+        self.on_commit = None  # 提交一个点后的回调(pos)，用于持久化
+        self.acc_sum = array('d')
+        self.acc_min = array('d')
+        self.acc_max = array('d')
+        self.acc_cnt = array('I')
+
+    def add_metric(self):
+        """为新指标分配存储（以NaN填充）"""
+        self.avg.append(array('f', [NAN]) * self.capacity)
+        if self.keep_range:
+            self.min.append(array('f', [NAN]) * self.capacity)
+            self.max.append(array('f', [NAN]) * self.capacity)
+        self.acc_sum.append(0.0)
+        self.acc_min.append(math.inf)
+        self.acc_max.append(-math.inf)
+        self.acc_cnt.append(0)
+
+    def add(self, timestamp: float, values: Dict[int, float]):
+        """累加一个样本，跨越桶边界时提交上一个桶"""
+        bucket = int(timestamp // self.step)
+        if self.bucket is not None and bucket != self.bucket:
+            self._commit()
+        self.bucket = bucket
+        for idx, value in values.items():
+            self.acc_sum[idx] += value
+            self.acc_cnt[idx] += 1
+            if value < self.acc_min[idx]:
+                self.acc_min[idx] = value
+            if value > self.acc_max[idx]:
+                self.acc_max[idx] = value
+
+    def _commit(self):
+        pos = self.head
+        self.times[pos] = self.bucket * self.step
+        for idx in range(len(self.avg)):
+            cnt = self.acc_cnt[idx]
+            if cnt:
+                self.avg[idx][pos] = self.acc_sum[idx] / cnt
+                if self.keep_range:
+                    self.min[idx][pos] = self.acc_min[idx]
+                    self.max[idx][pos] = self.acc_max[idx]
+            else:
+                self.avg[idx][pos] = NAN
+                if self.keep_range:
+                    self.min[idx][pos] = NAN
+                    self.max[idx][pos] = NAN
+            self.acc_sum[idx] = 0.0
+            self.acc_min[idx] = math.inf
+            self.acc_max[idx] = -math.inf
+            self.acc_cnt[idx] = 0
+        self.head = (pos + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        if self.on_commit:
+            self.on_commit(pos)
+
+    def load(self, rows, slots: int):
+        """从持久化记录恢复环形区（rows 按时间顺序）"""
+        rows = rows[-self.capacity:]
+        for pos, (timestamp, values) in enumerate(rows):
+            self.times[pos] = timestamp
+            for idx in range(len(self.avg)):
+                self.avg[idx][pos] = values[idx]
+                if self.keep_range:
+                    self.min[idx][pos] = values[slots + idx]
+                    self.max[idx][pos] = values[2 * slots + idx]
+        self.count = len(rows)
+        self.head = self.count % self.capacity
+
+    def row(self, pos: int, slots: int) -> List[float]:
+        """导出某个位置的定长记录：avg[slots] (+ min[slots] + max[slots])"""
+        padding = [NAN] * (slots - len(self.avg))
+        row = [values[pos] for values in self.avg] + padding
+        if self.keep_range:
+            row += [values[pos] for values in self.min] + padding
+            row += [values[pos] for values in self.max] + padding
+        return row
+
+    def points(self, idx: int, start: float, end: float):
+        """按时间顺序返回区间内的 (t, avg, min, max)"""
+        result = []
+        first = (self.head - self.count) % self.capacity
+        avg = self.avg[idx]
+        mins = self.min[idx] if self.keep_range else avg
+        maxs = self.max[idx] if self.keep_range else avg
+        for i in range(self.count):
+            pos = (first + i) % self.capacity
+            t = self.times[pos]
+            if t < start or t > end:
+                continue
+            value = avg[pos]
+            if value != value:  # NaN
+                continue
+            result.append((t, value, mins[pos], maxs[pos]))
+        return result
+
+
+class MetricHistory:
+    """定长内存指标历史：1秒原始层 + 分钟/十分钟 min/max/avg 汇总层"""
+
+    # (步长秒, 点数): 1小时@1s, 1天@1min, 1周@10min
+    TIERS = ((1, 3600), (60, 1440), (600, 1008))
+    MAX_METRICS = 32
+
+    def __init__(self, store=None):
+        self.lock = threading.Lock()
+        self.metric_index: Dict[str, int] = {}
+        self.tiers = [_Tier(step, capacity, keep_range=(i > 0))
+                      for i, (step, capacity) in enumerate(self.TIERS)]
+        # 可选的持久化存储（HistoryStore），每提交一个点写入一条记录
+        self.store = store
+        if store:
+            for i, tier in enumerate(self.tiers):
+                tier.on_commit = self._make_persist(i, tier)
+
+    def _make_persist(self, index: int, tier: _Tier):
+        def persist(pos):
+            self.store.append(index, tier.times[pos], tier.row(pos, self.MAX_METRICS))
+        return persist
+
+    def restore(self):
+        """从持久化存储恢复各层环形区，无需重新汇总"""
+        if not self.store:
+            return
+        with self.lock:
+            for name in self.store.names[:self.MAX_METRICS]:
+                if name:
+                    self._index_of(name, persist=False)
+            for i, tier in enumerate(self.tiers):
+                tier.load(self.store.records(i), self.MAX_METRICS)
+
+    def metrics(self) -> List[str]:
+        """已记录的指标名称"""
+        return list(self.metric_index)
+
+    def _index_of(self, name: str, persist: bool = True) -> Optional[int]:
+        idx = self.metric_index.get(name)
+        if idx is None and len(self.metric_index) < self.MAX_METRICS:
+            idx = len(self.metric_index)
+            self.metric_index[name] = idx
+            for tier in self.tiers:
+                tier.add_metric()
+            if self.store and persist:
+                self.store.set_name(idx, name)
+        return idx
+
+    def record(self, timestamp: float, values: Dict[str, float]):
+        """记录一个样本"""
+        with self.lock:
+            indexed = {}
+            for name, value in values.items():
+                if value != value:
+                    continue
+                idx = self._index_of(name)
+                if idx is not None:
+                    indexed[idx] = value
+            for tier in self.tiers:
+                tier.add(timestamp, indexed)
+
+    def on_snapshot(self, snapshot):
+        """采样器回调"""
+        self.record(snapshot.timestamp, snapshot.data.numeric_values())
+
+    def query(self, metric: str, start: float, end: float, points: int) -> Optional[Dict]:
+        """查询区间数据并在服务端降采样到至多 points 个点"""
+        points = max(1, points)
+        now = time.time()
+        with self.lock:
+            idx = self.metric_index.get(metric)
+            if idx is None:
+                return None
+            # 选择能覆盖起始时间的最细分辨率层：按查询区间的结束时间计算（允许一个步长的误差），
+            # 调用方用 to-3600 得到的一小时窗口仍落在秒级层
+            reference = min(end, now)
+            tier = self.tiers[-1]
+            for candidate in self.tiers:
+                if reference - candidate.step * candidate.capacity <= start + candidate.step:
+                    tier = candidate
+                    break
+            raw = tier.points(idx, start, end)
+
+        if len(raw) > points:
+            series = self._downsample(raw, start, end, points)
+        else:
+            series = raw
+        return {
+            'metric': metric,
+            'step': tier.step,
+            'points': [[round(t, 3), round(a, 3), round(lo, 3), round(hi, 3)]
+                       for t, a, lo, hi in series],
+        }
+
+    @staticmethod
+    def _downsample(raw, start: float, end: float, points: int):
+        """按等宽时间桶合并：avg取均值，min/max取极值"""
+        width = (end - start) / points if end > start else 1.0
+        buckets = {}
+        for t, a, lo, hi in raw:
+            b = min(points - 1, int((t - start) / width))
+            acc = buckets.get(b)
+            if acc is None:
+                buckets[b] = [a, lo, hi, 1]
+            else:
+                acc[0] += a
+                acc[1] = min(acc[1], lo)
+                acc[2] = max(acc[2], hi)
+                acc[3] += 1
+        return [(start + (b + 0.5) * width, acc[0] / acc[3], acc[1], acc[2])
+                for b, acc in sorted(buckets.items())]
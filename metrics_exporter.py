@@ -0,0 +1,175 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from perf import BUCKETS, PERF
+
+PREFIX = 'oled_monitor_'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (标签, 值) 列表
+Samples = Iterable[Tuple[Dict[str, object], Optional[float]]]
+
+
+def _escape(value) -> str:
+    """标签值转义：反斜杠、双引号、换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsExporter:
+    """Prometheus 文本格式导出：每个采样周期渲染一次并缓存，抓取只返回缓存内容"""
+
+    def __init__(self, system_monitor, displays, sampler, frame_scheduler=None):
+        self.system_monitor = system_monitor
+        self.displays = displays
+        self.sampler = sampler
+        self.frame_scheduler = frame_scheduler
+        self.body: Optional[bytes] = None
+        self.body_seq = -1
+        # 从未被抓取时不渲染
+        self.scraped = False
+        self.lock = threading.Lock()
+        self.http_requests: Dict[Tuple[str, int], int] = {}
+
+    def count_request(self, endpoint: str, status: int):
+        """记录一次HTTP请求"""
+        key = (endpoint or 'unknown', status)
+        with self.lock:
+            self.http_requests[key] = self.http_requests.get(key, 0) + 1
+
+    def on_snapshot(self, snapshot):
+        """采样线程回调：有抓取方时预先渲染本周期的内容"""
+        if self.scraped:
+            self._update(snapshot)
+
+    def exposition(self) -> bytes:
+        """返回当前周期的导出内容"""
+        self.scraped = True
+        snapshot = self.sampler.latest()
+        if self.body is None or (snapshot is not None and snapshot.seq != self.body_seq):
+            self._update(snapshot)
+        return self.body
+
+    def _update(self, snapshot):
+        body = self.render(snapshot).encode('utf-8')
+        self.body, self.body_seq = body, snapshot.seq if snapshot else -1
+
+    @staticmethod
+    def _family(lines: List[str], name: str, kind: str, help_text: str, samples: Samples):
+        """输出一个指标族，值为None的样本跳过"""
+        rendered = []
+        for labels, value in samples:
+            if value is None:
+                continue
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                rendered.append(f"{PREFIX}{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                rendered.append(f"{PREFIX}{name} {_format_value(value)}")
+        if rendered:
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            lines.extend(rendered)
+
+    def render(self, snapshot) -> str:
+        """生成完整的导出文本"""
+        lines: List[str] = []
+        family = self._family
+
+        if snapshot is not None:
+            data = snapshot.data
+            family(lines, 'sample_timestamp_seconds', 'gauge', "Time of the last sample.", [({}, data.timestamp)])
+            family(lines, 'sample_seq', 'gauge', "Sequence number of the last sample.", [({}, snapshot.seq)])
+            family(lines, 'cpu_usage_percent', 'gauge', "Overall CPU usage.", [({}, data.cpu_usage)])
+            family(lines, 'cpu_core_usage_percent', 'gauge', "Per-core CPU usage.",
+                   [({'core': i}, usage) for i, usage in enumerate(data.cpu_cores)])
+            family(lines, 'cpu_iowait_percent', 'gauge', "CPU time waiting for IO.", [({}, data.cpu_iowait)])
+            family(lines, 'cpu_steal_percent', 'gauge', "CPU time stolen by the hypervisor.", [({}, data.cpu_steal)])
+            family(lines, 'cpu_softirq_percent', 'gauge', "CPU time in soft interrupts.", [({}, data.cpu_softirq)])
+            family(lines, 'cpu_frequency_mhz', 'gauge', "Current CPU frequency.", [({}, data.cpu_freq)])
+            family(lines, 'memory_usage_percent', 'gauge', "Memory usage.", [({}, data.mem_usage)])
+            family(lines, 'memory_used_bytes', 'gauge', "Used memory.", [({}, data.mem_used)])
+            family(lines, 'memory_total_bytes', 'gauge', "Total memory.", [({}, data.mem_total)])
+            family(lines, 'cpu_temperature_celsius', 'gauge', "Primary CPU temperature.", [({}, data.cpu_temp)])
+            family(lines, 'sensor_temperature_celsius', 'gauge', "Temperature per sensor.",
+                   [({'sensor': label, 'kind': kind}, temp) for label, kind, temp in data.sensors])
+            if data.interface:
+                interface = {'interface': data.interface}
+                family(lines, 'network_transmit_bytes_per_second', 'gauge', "Upload rate of the active interface.",
+                       [(interface, data.net_upload)])
+                family(lines, 'network_receive_bytes_per_second', 'gauge', "Download rate of the active interface.",
+                       [(interface, data.net_download)])
+                family(lines, 'network_info', 'gauge', "Active interface, address and network name.",
+                       [({'interface': data.interface, 'ip': data.ip or '', 'network': data.network_name or ''}, 1)])
+
+        family(lines, 'uptime_seconds', 'gauge', "Process uptime.", [({}, self.system_monitor.get_uptime())])
+        self._render_self_metrics(lines)
+        lines.append('')
+        return '\n'.join(lines)
+
+    def _render_self_metrics(self, lines: List[str]):
+        """调度、显示传输和HTTP请求等自身指标"""
+        family = self._family
+        schedulers = [('sampler', self.sampler.scheduler)]
+        if self.frame_scheduler:
+            schedulers.append(('display', self.frame_scheduler))
+        family(lines, 'loop_overruns_total', 'counter', "Periods whose work overran the interval.",
+               [({'loop': name}, s.overruns) for name, s in schedulers])
+        family(lines, 'loop_missed_ticks_total', 'counter', "Ticks skipped after overruns.",
+               [({'loop': name}, s.missed_ticks) for name, s in schedulers])
+        family(lines, 'loop_max_lateness_seconds', 'gauge', "Largest wake-up lateness seen.",
+               [({'loop': name}, s.max_lateness) for name, s in schedulers])
+
+        if self.displays:
+            stats = self.displays.get_stats()
+            family(lines, 'display_connected', 'gauge', "Whether the panel is connected.",
+                   [({'display': s['name']}, int(s['connected'])) for s in stats])
+            family(lines, 'display_frames_total', 'counter', "Frames flushed to the panel.",
+                   [({'display': s['name']}, s['frames']) for s in stats])
+            family(lines, 'display_frames_unchanged_total', 'counter', "Frames that needed no bus traffic.",
+                   [({'display': s['name']}, s['frames_unchanged']) for s in stats])
+            family(lines, 'i2c_bytes_total', 'counter', "Bytes written to the panel over I2C.",
+                   [({'display': s['name']}, s['bytes_sent']) for s in stats])
+            # 写入线程按总线共享，统计按总线去重
+            writers = {}
+            for display in self.displays.displays:
+                writers[display.writer.name] = display.writer.get_stats()
+            family(lines, 'display_frames_dropped_total', 'counter', "Frames replaced before being sent.",
+                   [({'writer': name}, s['frames_dropped']) for name, s in writers.items()])
+            family(lines, 'display_transfer_seconds_max', 'gauge', "Slowest frame transfer.",
+                   [({'writer': name}, s['max_latency_ms'] / 1000) for name, s in writers.items()])
+
+        with self.lock:
+            requests = sorted(self.http_requests.items())
+        family(lines, 'http_requests_total', 'counter', "HTTP requests served.",
+               [({'endpoint': endpoint, 'code': code}, count) for (endpoint, code), count in requests])
+
+        if PERF.enabled:
+            self._render_perf(lines)
+
+    @staticmethod
+    def _render_perf(lines: List[str]):
+        """插桩直方图，按 Prometheus histogram 格式输出累计桶"""
+        with PERF.lock:
+            histograms = [(name, list(h.counts), h.count, h.total) for name, h in sorted(PERF.histograms.items())]
+        if not histograms:
+            return
+        name = f"{PREFIX}span_duration_seconds"
+        lines.append(f"# HELP {name} Latency of instrumented hot paths.")
+        lines.append(f"# TYPE {name} histogram")
+        for span, counts, count, total in histograms:
+            label = f'span="{_escape(span)}"'
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{{label},le="{bound!r}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{label}}} {total!r}")
+            lines.append(f"{name}_count{{{label}}} {count}")
@@ -0,0 +1,97 @@
+import socket
+import threading
+from typing import Optional
+
+# rtnetlink 组播组（linux/rtnetlink.h）
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+
+
+class NetworkWatcher:
+    """监听网络变化（rtnetlink事件，不可用时检测 /proc/net/route 内容变化）
+
+    每次变化使 generation 加一，调用方比较 generation 即可判断缓存是否失效。
+    """
+
+    def __init__(self, route_path: str = "/proc/net/route", poll_interval: float = 5.0):
+        self.route_path = route_path
+        self.poll_interval = poll_interval
+        self.generation = 0
+        self.mode = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动监听线程"""
+        if self.running:
+            return
+        self.running = True
+        self._stop_event.clear()
+        sock = self._open_netlink()
+        if sock is not None:
+            self.mode = 'netlink'
+            target = self._run_netlink
+            args = (sock,)
+        else:
+            self.mode = 'poll'
+            target = self._run_poll
+            args = ()
+        self.thread = threading.Thread(target=target, args=args, name="network-watcher", daemon=True)
+        self.thread.start()
+
+    def _open_netlink(self) -> Optional[socket.socket]:
+        if not hasattr(socket, 'AF_NETLINK'):
+            return None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_IFADDR))
+            sock.settimeout(1.0)
+            return sock
+        except OSError as e:
+            print(f"rtnetlink不可用，改为检测路由表变化: {e}")
+            return None
+
+    def _run_netlink(self, sock: socket.socket):
+        """阻塞等待内核路由/地址/链路事件"""
+        try:
+            while self.running:
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    # 缓冲区溢出(ENOBUFS)时也视为发生变化
+                    print(f"rtnetlink读取失败: {e}")
+                    self.generation += 1
+                    continue
+                if data:
+                    self.generation += 1
+        finally:
+            sock.close()
+
+    def _read_routes(self) -> Optional[str]:
+        try:
+            with open(self.route_path, 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _run_poll(self):
+        """回退方案：定期比较路由表内容"""
+        last = self._read_routes()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._read_routes()
+            if current != last:
+                last = current
+                self.generation += 1
+
+    def stop(self):
+        """停止监听线程"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -1,27 +1,86 @@
 import os
 import fcntl
-from typing import List, Optional
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from display_writer import DisplayWriter
+from perf import PERF
+from system_info import SystemInfo
+
+GB = 1024 ** 3
+
+I2C_SLAVE = 0x0703
+# 探测报文：控制字节0x00(命令) + 0xE3(NOP)，真实写事务但不改变屏幕状态
+PROBE_MESSAGE = b'\x00\xe3'
+# 重连退避上限(秒)
+MAX_RECONNECT_BACKOFF = 60.0
+
+# 可选的屏幕页面布局
+PAGES = ('overview', 'cpu', 'network')
 
 # OLED显示库
 try:
     from luma.core.interface.serial import i2c
-    from luma.core.render import canvas
     from luma.oled.device import ssd1306
-    from PIL import ImageFont, ImageDraw
+    from PIL import Image, ImageFont, ImageDraw
+    from glyph_atlas import GlyphAtlas
     OLED_AVAILABLE = True
 except ImportError:
     OLED_AVAILABLE = False
     print("OLED库未安装，将仅运行Web Dashboard模式")
 
+class DisplayConfig:
+    """单个屏幕的配置视图：屏幕定义中的键优先，其余回退到全局配置"""
+    
+    def __init__(self, config_manager, overrides: Optional[Dict[str, Any]] = None):
+        self.config = config_manager
+        self.overrides = overrides or {}
+    
+    def get(self, key: str, default=None):
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.config.get(key, default)
+
+
 class OLEDDisplay:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, writer: Optional[DisplayWriter] = None):
         self.config = config_manager
+        self.name = self.config.get('name') or \
+            f"i2c-{self.config.get('i2c_port', 1)}@0x{self.config.get('oled_address', 60):02x}"
+        self.page = self.config.get('page', 'overview')
+        if self.page not in PAGES:
+            print(f"未知的屏幕页面 {self.page}，使用 overview")
+            self.page = 'overview'
         self.device: Optional[ssd1306] = None
         self.serial: Optional[i2c] = None
         self.is_connected = False
         
+        # 上一帧各页(8行)的显存内容，用于差分发送
+        self.last_pages: Optional[List[bytes]] = None
+        self.frames = 0
+        self.frames_unchanged = 0
+        self.bytes_sent = 0
+        self.last_frame_bytes = 0
+        
+        # 渲染在主循环，I2C传输在写入线程；设备对象的创建/释放与传输互斥
+        self.device_lock = threading.RLock()
+        # 同一总线上的屏幕共用一个写入线程
+        self.writer = writer or DisplayWriter()
+        
+        # 面板是否处于显示开启状态（关闭时显存内容保留）
+        self.powered = False
+        
+        # 设备缺失时的重连计划（单调时钟）
+        self.next_probe = 0.0
+        self.reconnect_delay = 0.0
+        
         if OLED_AVAILABLE:
             self.fonts = {}
+            self.atlases = {}
+            # 边框、分隔线、标签和进度条外框只在布局变化时绘制一次
+            self.static_layer = None
             self.row_positions: List[int] = []
             self.row_height = 0
             self.load_fonts()
@@ -59,6 +118,9 @@ class OLEDDisplay:
                 'large': ImageFont.load_default()
             }
             print(f"字体加载失败，使用默认字体: {e}")
+        
+        self.atlases = {key: GlyphAtlas(font) for key, font in self.fonts.items()}
+        self.static_layer = None
     
     def calculate_layout(self):
         """计算布局"""
@@ -72,23 +134,38 @@ class OLEDDisplay:
         for i in range(self.config.get('display_rows', 5)):
             y = self.config.get('row_spacing', 2) + i * (self.row_height + self.config.get('row_spacing', 2))
             self.row_positions.append(y)
+        self.static_layer = None
     
-    def scan_i2c_bus(self, port: int) -> List[int]:
-        """扫描I2C总线"""
-        devices = []
+    def apply_config(self, changed: Set[str]):
+        """配置变化后只重算受影响的部分（在主循环中调用）"""
+        if not OLED_AVAILABLE:
+            return
+        if changed & {'width', 'height'}:
+            # 设备按尺寸创建，释放后由重连流程按新尺寸初始化
+            self.release()
+            self.next_probe = 0.0
+        if changed & {'height', 'display_rows', 'row_spacing'}:
+            self.load_fonts()
+            self.calculate_layout()
+        elif 'width' in changed:
+            self.static_layer = None
+    
+    def probe(self) -> bool:
+        """只对配置的地址发起一次真实写事务，设备不应答时写入失败"""
+        port = self.config.get('i2c_port', 1)
         try:
-            i2c_bus = os.open(f"/dev/i2c-{port}", os.O_RDWR)
-            if i2c_bus >= 0:
-                for addr in range(0x03, 0x78):
-                    try:
-                        fcntl.ioctl(i2c_bus, 0x0703, addr)
-                        devices.append(addr)
-                    except OSError:
-                        continue
-                os.close(i2c_bus)
-        except Exception as e:
-            print(f"I2C总线扫描失败: {e}")
-        return devices
+            fd = os.open(f"/dev/i2c-{port}", os.O_RDWR)
+        except OSError as e:
+            print(f"无法打开I2C-{port}总线: {e}")
+            return False
+        try:
+            fcntl.ioctl(fd, I2C_SLAVE, self.config.get('oled_address', 60))
+            os.write(fd, PROBE_MESSAGE)
+            return True
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
     
     def init_oled(self) -> bool:
         """初始化OLED"""
@@ -96,107 +173,345 @@ class OLEDDisplay:
             return False
             
         try:
-            online_devices = self.scan_i2c_bus(self.config.get('i2c_port', 1))
-            if self.config.get('oled_address', 60) not in online_devices:
-                print(f"未在I2C-{self.config.get('i2c_port', 1)}总线上发现OLED设备")
-                return False
-            
             self.serial = i2c(port=self.config.get('i2c_port', 1), address=self.config.get('oled_address', 60))
-            self.device = ssd1306(self.serial, rotate=0)
+            self.device = ssd1306(self.serial, width=self.config.get('width', 128),
+                                  height=self.config.get('height', 64), rotate=0)
+            self.powered = True
             print("OLED设备初始化成功")
             return True
         except Exception as e:
             print(f"OLED初始化失败: {e}")
-            if self.serial:
-                self.serial.cleanup()
-                self.serial = None
+            self.release()
+            return False
+    
+    def ensure_connected(self) -> bool:
+        """已连接时不访问总线；未连接时按 reconnect_interval 指数退避探测并初始化"""
+        if not OLED_AVAILABLE:
+            return False
+        if self.is_connected:
+            return True
+        if time.monotonic() < self.next_probe:
             return False
+        
+        with self.device_lock:
+            if self.probe() and self.init_oled():
+                self.is_connected = True
+                self.reconnect_delay = 0.0
+                print("OLED设备已连接")
+                return True
+        
+        self.schedule_reconnect()
+        print(f"未在I2C-{self.config.get('i2c_port', 1)}总线上发现OLED设备 {self.name}，"
+              f"{self.reconnect_delay:.1f}秒后重试")
+        return False
+    
+    def schedule_reconnect(self):
+        """安排下一次探测，间隔从 reconnect_interval 起逐次翻倍"""
+        base = max(0.1, float(self.config.get('reconnect_interval', 2.0)))
+        if self.reconnect_delay:
+            self.reconnect_delay = min(self.reconnect_delay * 2, MAX_RECONNECT_BACKOFF)
+        else:
+            self.reconnect_delay = min(base, MAX_RECONNECT_BACKOFF)
+        self.next_probe = time.monotonic() + self.reconnect_delay
+    
+    def handle_write_error(self, error: Exception):
+        """写入失败即视为断开：释放资源（不再写总线）并进入退避重连"""
+        print(f"OLED设备已断开: {error}")
+        self.release()
+        self.schedule_reconnect()
+    
+    def power_off(self):
+        """发送 DISPLAYOFF 让面板进入低功耗状态，保留设备和显存，唤醒时无需重新初始化"""
+        self.writer.discard(self)
+        with self.device_lock:
+            if not self.device or not self.is_connected or not self.powered:
+                return
+            try:
+                self.device.hide()
+                self.powered = False
+                print("OLED显示已关闭")
+            except Exception as e:
+                self.handle_write_error(e)
+    
+    def power_on(self):
+        """发送 DISPLAYON 恢复显示，显存中仍是关闭前的画面，差分发送继续有效"""
+        with self.device_lock:
+            if not self.device or not self.is_connected or self.powered:
+                return
+            try:
+                self.device.show()
+                self.powered = True
+                print("OLED显示已开启")
+            except Exception as e:
+                self.handle_write_error(e)
+    
+    def release(self):
+        """释放I2C资源，不向设备发送任何命令"""
+        with self.device_lock:
+            try:
+                if self.serial:
+                    self.serial.cleanup()
+            except Exception:
+                pass
+            finally:
+                self.serial = None
+                self.device = None
+                self.last_pages = None
+                self.is_connected = False
+                self.powered = False
     
     def cleanup(self):
         """清理资源（确保清屏）"""
         if not OLED_AVAILABLE:
             return
             
-        try:
-            if self.device:
-                self.device.clear()  # 清屏
-                self.device.cleanup()
-                print("OLED设备资源已释放")
-            if self.serial:
-                self.serial.cleanup()
-                self.serial = None
-        except Exception as e:
-            print(f"OLED设备清理失败: {e}")
-        finally:
-            self.device = None
-            self.is_connected = False
+        self.writer.discard(self)
+        with self.device_lock:
+            try:
+                if self.device:
+                    self.device.clear()  # 清屏
+                    self.device.cleanup()
+                    print("OLED设备资源已释放")
+            except Exception as e:
+                print(f"OLED设备清理失败: {e}")
+            finally:
+                self.release()
+            # 主动关闭后再次需要显示时立即重连
+            self.next_probe = 0.0
+            self.reconnect_delay = 0.0
     
-    def check_connection(self) -> bool:
-        """检查OLED连接"""
-        if not OLED_AVAILABLE:
-            return False
-        online_devices = self.scan_i2c_bus(self.config.get('i2c_port', 1))
-        return self.config.get('oled_address', 60) in online_devices
+    def bar_box(self, row: int, x: int = 49, width: int = 40) -> tuple:
+        """进度条外框位置 (x, y, 宽, 高)"""
+        return x, self.row_positions[row] + self.row_height // 2 - 3, width, 6
     
-    def draw_progress_bar(self, draw: ImageDraw.ImageDraw, x: int, y: int, width: int, height: int, percent: float):
-        """绘制进度条"""
-        draw.rectangle([x, y, x+width, y+height], outline="white", fill="black")
-        fill_width = int((width-2) * percent / 100)
+    def draw_progress_bar(self, image, box: tuple, percent: float):
+        """在外框内填充进度条"""
+        x, y, width, height = box
+        fill_width = int((width-2) * min(max(percent, 0), 100) / 100)
         if fill_width > 0:
-            draw.rectangle([x+1, y+1, x+fill_width, y+height-1], fill="white")
+            image.paste(1, (x+1, y+1, x+fill_width+1, y+height))
     
-    def draw_text_line(self, draw: ImageDraw.ImageDraw, row: int, text: str, x: int = 2, font_key: str = 'medium'):
-        """绘制文本行"""
+    def draw_text_line(self, image, row: int, text: str, x: int = 2, font_key: str = 'medium', limit: Optional[int] = None):
+        """用字形缓存绘制文本行"""
         if row < len(self.row_positions):
-            y = self.row_positions[row] - 1
-            draw.text((x, y), text, fill="white", font=self.fonts[font_key])
+            self.atlases[font_key].draw(image, (x, self.row_positions[row] - 1), text, limit)
     
-    def draw_display(self, system_info: dict):
-        """绘制显示内容"""
-        if not OLED_AVAILABLE or not self.device or not self.is_connected:
+    def freq_label_x(self) -> int:
+        """第2行 "Freq:" 标签右对齐后的起始位置"""
+        atlas = self.atlases['medium']
+        return self.config.get('width', 128) - 2 - atlas.text_width("Freq:0000M")
+    
+    def build_static_layer(self):
+        """绘制不随数据变化的部分：边框、分隔线以及当前页面的固定标签和进度条外框"""
+        image = Image.new(self.device.mode, self.device.size)
+        draw = ImageDraw.Draw(image)
+        width = self.config.get('width', 128)
+        height = self.config.get('height', 64)
+        
+        draw.rectangle([0, 0, width-1, height-1], fill="black", outline="white")
+        for i in range(1, self.config.get('display_rows', 5)):
+            y = self.row_positions[i] - self.config.get('row_spacing', 2) // 2
+            draw.line((0, y, width, y), fill="white")
+        
+        if self.page == 'overview':
+            self.draw_text_line(image, 1, "IP:")
+            self.draw_text_line(image, 1, "Freq:", x=self.freq_label_x())
+            self.draw_text_line(image, 2, "CPU:")
+            self.draw_text_line(image, 3, "MEM:")
+            for row in (2, 3):
+                x, y, w, h = self.bar_box(row)
+                draw.rectangle([x, y, x+w, y+h], outline="white", fill="black")
+        elif self.page == 'network':
+            for row, label in enumerate(("IP:", "UP:", "DN:", "TMP:"), start=1):
+                self.draw_text_line(image, row, label)
+        self.static_layer = image
+    
+    @staticmethod
+    def format_temperature(temp: Optional[float]) -> str:
+        """格式化温度"""
+        return f"{temp:.1f}°C" if temp is not None else "N/A"
+    
+    @staticmethod
+    def format_network_name(system_info: SystemInfo) -> str:
+        """网络名称：WiFi显示SSID，有线显示接口名"""
+        if system_info.network_name:
+            return system_info.network_name[:12]
+        return "无WiFi" if system_info.interface else "无网络"
+    
+    @staticmethod
+    def format_speed(speed: Optional[float]) -> str:
+        """格式化单个方向的速度（字节/秒）"""
+        if speed is None:
+            return "  N/A"
+        speed = speed / 128  # 显示单位K
+        if speed < 1024:
+            return f"{speed:>5.1f}K"
+        else:
+            return f"{speed/1024:>5.1f}M"
+    
+    @classmethod
+    def format_network_speed(cls, system_info: SystemInfo) -> str:
+        """格式化上传/下载速度"""
+        if system_info.net_upload is None or system_info.net_download is None:
+            return " N/A   N/A"
+        return f"{cls.format_speed(system_info.net_upload)} {cls.format_speed(system_info.net_download)}"
+    
+    @staticmethod
+    def encode_pages(image) -> List[bytes]:
+        """将1位图像转换为SSD1306页格式：每页 width 字节，bit0 为该页最上面一行"""
+        pages = image.size[1] // 8
+        # 顺时针旋转后每行对应原图一列，按位打包后恰好是自下而上的页字节
+        buf = image.transpose(Image.ROTATE_270).tobytes()
+        return [buf[pages - 1 - page::pages] for page in range(pages)]
+    
+    def flush(self, image):
+        """只发送相对上一帧有变化的页/列窗口，无变化时不访问总线"""
+        device = self.device
+        if not isinstance(device, ssd1306):
+            device.display(image)
+            sent = image.size[0] * image.size[1] // 8
+        else:
+            pages = self.encode_pages(device.preprocess(image))
+            last_pages = self.last_pages
+            colstart = device._colstart
+            sent = 0
+            for page, data in enumerate(pages):
+                if last_pages is None:
+                    first, last = 0, len(data) - 1
+                else:
+                    diff = int.from_bytes(data, 'big') ^ int.from_bytes(last_pages[page], 'big')
+                    if not diff:
+                        continue
+                    # 大端序下最高位差异对应最左列，最低位差异对应最右列
+                    first = len(data) - (diff.bit_length() + 7) // 8
+                    last = len(data) - 1 - ((diff & -diff).bit_length() - 1) // 8
+                
+                device.command(0x21, colstart + first, colstart + last,  # COLUMNADDR
+                               0x22, page, page)                          # PAGEADDR
+                device.data(data[first:last + 1])
+                sent += 6 + last - first + 1
+            self.last_pages = pages
+        
+        self.frames += 1
+        if sent == 0:
+            self.frames_unchanged += 1
+        self.last_frame_bytes = sent
+        self.bytes_sent += sent
+    
+    def write_frame(self, image) -> bool:
+        """发送一帧（在写入线程中调用），写入失败视为断开"""
+        with self.device_lock:
+            if not self.device or not self.is_connected:
+                return False
+            try:
+                with PERF.span('display.flush'):
+                    self.flush(image)
+                return True
+            except Exception as e:
+                self.handle_write_error(e)
+                return False
+    
+    def get_stats(self) -> dict:
+        """显示传输统计（写入线程统计为所在总线的汇总）"""
+        stats = {
+            'name': self.name,
+            'page': self.page,
+            'connected': self.is_connected,
+            'frames': self.frames,
+            'frames_unchanged': self.frames_unchanged,
+            'bytes_sent': self.bytes_sent,
+            'last_frame_bytes': self.last_frame_bytes,
+        }
+        stats.update(self.writer.get_stats())
+        return stats
+    
+    def draw_display(self, system_info: SystemInfo):
+        """渲染一帧并交给写入线程；写入线程未启动时同步发送"""
+        with PERF.span('display.render'):
+            image = self.render(system_info)
+        if image is None:
             return
+        if self.writer.running:
+            self.writer.submit(self, image)
+        else:
+            self.write_frame(image)
+    
+    def render(self, system_info: SystemInfo):
+        """绘制显示内容，返回整帧图像（不访问总线）"""
+        if not OLED_AVAILABLE or not self.device or not self.is_connected:
+            return None
         
         try:
-            with canvas(self.device) as draw:
-                width = self.config.get('width', 128)
-                height = self.config.get('height', 64)
-                
-                # 绘制边框
-                draw.rectangle([0, 0, width-1, height-1], fill="black", outline="white")
-                
-                # 绘制分隔线
-                for i in range(1, self.config.get('display_rows', 5)):
-                    y = self.row_positions[i] - self.config.get('row_spacing', 2) // 2
-                    draw.line((0, y, width, y), fill="white")
-                
-                # 第1行: 时间信息
-                self.draw_text_line(draw, 0, f"{system_info['date_str']} {system_info['weekday_str']} {system_info['time_str']}", font_key='large')
-                
-                # 第2行: IP和CPU频率
-                self.draw_text_line(draw, 1, f"IP:{system_info['ip']} Freq:{int(system_info['cpu_freq']):>4d}M")
-                
-                # 第3行: CPU使用率和温度
-                cpu_text = f"CPU:{int(system_info['cpu_usage']):>2d}%"
-                self.draw_text_line(draw, 2, cpu_text)
-                
-                # CPU进度条
-                y_pos = self.row_positions[2] + self.row_height // 2 - 3
-                self.draw_progress_bar(draw, 49, y_pos, 40, 6, system_info['cpu_usage'])
-                self.draw_text_line(draw, 2, system_info['cpu_temp'], x=93)
-                
-                # 第4行: 内存使用率
-                mem_text = f"MEM:{int(system_info['mem_usage']):>2d}%"
-                self.draw_text_line(draw, 3, mem_text)
-                
-                # 内存进度条
-                y_pos = self.row_positions[3] + self.row_height // 2 - 3
-                self.draw_progress_bar(draw, 49, y_pos, 40, 6, system_info['mem_usage'])
-                self.draw_text_line(draw, 3, f"{system_info['mem_used']:.1f}/{system_info['mem_total']:.1f}", x=93)
-                
-                # 第5行: 网络信息
-                net_text = f"{system_info['network_name']:8}: {system_info['net_speed']}"
-                self.draw_text_line(draw, 4, net_text)
-                
+            if self.static_layer is None:
+                self.build_static_layer()
+            image = self.static_layer.copy()
+            getattr(self, f"draw_{self.page}_page")(image, system_info)
+            return image
+            
         except Exception as e:
             print(f"屏幕绘制失败: {e}")
-            self.cleanup()
\ No newline at end of file
+            return None
+    
+    def draw_overview_page(self, image, system_info: SystemInfo):
+        """总览页：时间、IP/频率、CPU、内存、网络"""
+        atlas = self.atlases['medium']
+        label_width = atlas.text_width("CPU:")
+        
+        # 第1行: 时间信息
+        now = datetime.fromtimestamp(system_info.timestamp)
+        self.draw_text_line(image, 0, now.strftime("%Y-%m-%d %a %H:%M:%S"), font_key='large')
+        
+        # 第2行: IP和CPU频率（IP过长时在频率标签前截断）
+        freq_x = self.freq_label_x()
+        self.draw_text_line(image, 1, system_info.ip or "无IP", x=2 + atlas.text_width("IP:"), limit=freq_x - 2)
+        self.draw_text_line(image, 1, f"{int(system_info.cpu_freq):>4d}M", x=freq_x + atlas.text_width("Freq:"))
+        
+        # 第3行: CPU使用率、进度条和温度
+        self.draw_text_line(image, 2, f"{int(system_info.cpu_usage):>2d}%", x=2 + label_width)
+        self.draw_progress_bar(image, self.bar_box(2), system_info.cpu_usage)
+        self.draw_text_line(image, 2, self.format_temperature(system_info.cpu_temp), x=93)
+        
+        # 第4行: 内存使用率、进度条和用量
+        self.draw_text_line(image, 3, f"{int(system_info.mem_usage):>2d}%", x=2 + label_width)
+        self.draw_progress_bar(image, self.bar_box(3), system_info.mem_usage)
+        self.draw_text_line(image, 3, f"{system_info.mem_used / GB:.1f}/{system_info.mem_total / GB:.1f}", x=93)
+        
+        # 第5行: 网络信息
+        net_text = f"{self.format_network_name(system_info):8}: {self.format_network_speed(system_info)}"
+        self.draw_text_line(image, 4, net_text)
+        
+        # 第6行（可选）: CPU iowait/steal/softirq
+        if self.config.get('show_cpu_detail', False) and len(self.row_positions) > 5:
+            detail_text = (f"IO:{system_info.cpu_iowait:.0f}% "
+                           f"ST:{system_info.cpu_steal:.0f}% "
+                           f"SI:{system_info.cpu_softirq:.0f}%")
+            self.draw_text_line(image, 5, detail_text, font_key='small')
+    
+    def draw_cpu_page(self, image, system_info: SystemInfo):
+        """CPU页：总体占用/频率/温度，其余各行每行两个核心的占用条"""
+        self.draw_text_line(image, 0, f"CPU{int(system_info.cpu_usage):>3d}% {int(system_info.cpu_freq):>4d}M "
+                                      f"{self.format_temperature(system_info.cpu_temp)}")
+        draw = ImageDraw.Draw(image)
+        width = self.config.get('width', 128)
+        column_width = (width - 4) // 2
+        for i, usage in enumerate(system_info.cpu_cores):
+            row, column = 1 + i // 2, i % 2
+            if row >= len(self.row_positions):
+                break
+            x = 2 + column * column_width
+            self.draw_text_line(image, row, f"C{i}", x=x, font_key='small')
+            box = self.bar_box(row, x=x + 16, width=column_width - 20)
+            bx, by, bw, bh = box
+            draw.rectangle([bx, by, bx+bw, by+bh], outline="white", fill="black")
+            self.draw_progress_bar(image, box, usage)
+    
+    def draw_network_page(self, image, system_info: SystemInfo):
+        """网络页：网络名称、IP、上传/下载速度和温度"""
+        atlas = self.atlases['medium']
+        value_x = 2 + atlas.text_width("TMP:")
+        self.draw_text_line(image, 0, self.format_network_name(system_info), font_key='large')
+        self.draw_text_line(image, 1, system_info.ip or "无IP", x=value_x)
+        self.draw_text_line(image, 2, self.format_speed(system_info.net_upload), x=value_x)
+        self.draw_text_line(image, 3, self.format_speed(system_info.net_download), x=value_x)
+        temps = [self.format_temperature(temp) for label, kind, temp in system_info.sensors[:2]]
+        self.draw_text_line(image, 4, " ".join(temps) or self.format_temperature(system_info.cpu_temp), x=value_x)
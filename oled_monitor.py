@@ -1,43 +1,113 @@
 #!/usr/bin/env python3
-import time
+import argparse
+import os
 import signal
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
 from config_manager import ConfigManager
+from config_watcher import ConfigWatcher
 from system_monitor import SystemMonitor
-from oled_display import OLEDDisplay
+from display_manager import DisplayManager
+from sampler import MetricSampler
+from frame_scheduler import FrameScheduler
+from wake_detector import WakeDetector
+from fleet_hub import FleetHub
+from metric_history import MetricHistory
+from history_store import HistoryStore
+from perf import PERF
+from snapshot_trace import TracePlayer, TraceWriter
 from web_server import WebServer
 
 class OLEDMonitor:
-    def __init__(self, config_file="config.json"):
+    def __init__(self, config_file="config.json", hub=False, record: Optional[str] = None,
+                 player: Optional[TracePlayer] = None):
         self.config = ConfigManager(config_file)
+        # 外部修改配置文件时热加载，变化的键通知给各订阅者
+        self.config_watcher = ConfigWatcher(self.config)
+        # 回放模式下由轨迹代替实时采集
+        self.player = player
+        PERF.configure(self.config.get('perf.enabled', False))
         self.system_monitor = SystemMonitor(self.config)
-        self.oled_display = OLEDDisplay(self.config)
-        self.web_server = WebServer(self.config, self.system_monitor, self.oled_display)
+        self.displays = DisplayManager(self.config)
+        self.sampler = MetricSampler(self.config, self.system_monitor)
+        self.wake_detector = WakeDetector(self.system_monitor)
+        self.history = None
+        self.history_store = None
+        self.setup_history()
+        self.trace_writer = None
+        if record:
+            writer = TraceWriter(record)
+            if writer.open():
+                self.trace_writer = writer
+                self.sampler.add_listener(writer.on_snapshot)
+        self.frame_scheduler = FrameScheduler(self.config.get('scan_interval', 1.0))
+        # 集群汇总模式：除本机外，汇总 fleet.nodes 中各节点的状态
+        self.fleet_hub = FleetHub(self.config) if hub or self.config.get('fleet.enabled', False) else None
+        self.web_server = WebServer(self.config, self.system_monitor, self.displays,
+                                    self.sampler, self.history, self.frame_scheduler, self.fleet_hub)
+        self.config.subscribe(self.on_config_change, 'scan_interval', 'perf')
+        self.last_seq = 0
         self.running = False
         self.sleep_mode = False
+        # 所有等待都挂在该事件上，收到退出信号时立即返回
+        self.stop_event = threading.Event()
         
         # 注册信号处理
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
     
+    def setup_history(self):
+        """创建指标历史，启用持久化时映射历史文件并恢复环形区"""
+        if not self.config.get('history.enabled', True):
+            return
+        
+        # 回放的数据不写入历史文件
+        if self.config.get('history.persist', True) and self.player is None:
+            history_file = self.config.get('history.file', 'history.dat')
+            if not os.path.isabs(history_file):
+                config_dir = os.path.dirname(os.path.abspath(self.config.config_file))
+                history_file = os.path.join(config_dir, history_file)
+            store = HistoryStore(history_file, MetricHistory.TIERS,
+                                 self.config.get('history.flush_interval', 60))
+            if store.open():
+                self.history_store = store
+        
+        self.history = MetricHistory(self.history_store)
+        self.history.restore()
+        self.sampler.add_listener(self.history.on_snapshot)
+    
+    def on_config_change(self, changed):
+        """帧周期和性能插桩随配置即时生效"""
+        settings = self.config.settings
+        if 'scan_interval' in changed:
+            self.frame_scheduler.interval = max(0.1, settings.scan_interval)
+        if changed & {'perf.enabled', 'perf.log_interval'}:
+            PERF.configure(settings.perf.enabled)
+            PERF.stop_reporting()
+            if settings.perf.enabled and self.running:
+                PERF.start_reporting(float(settings.perf.log_interval))
+    
     def signal_handler(self, signum, frame):
         """信号处理函数"""
         print(f"\n收到信号 {signum}，程序退出中...")
         self.running = False
+        self.stop_event.set()
     
-    def is_display_time(self) -> bool:
+    def is_display_time(self, now: Optional[datetime] = None) -> bool:
         """检查是否在显示时间段内"""
-        display_enabled = self.config.get('display_settings.enabled', True)
-        if not display_enabled:
+        display_settings = self.config.settings.display_settings
+        if not display_settings.enabled:
             return True
         
-        now = datetime.now()
+        now = now or datetime.now()
         current_hour = now.hour
-        start_hour = self.config.get('display_settings.start_hour', 10)
-        end_hour = self.config.get('display_settings.end_hour', 25)
+        start_hour = display_settings.start_hour
+        end_hour = display_settings.end_hour
         
         # 处理跨天情况
         if end_hour >= 24:
@@ -45,16 +115,16 @@ class OLEDMonitor:
         else:
             return start_hour <= current_hour < end_hour
     
-    def is_sleep_time(self) -> bool:
+    def is_sleep_time(self, now: Optional[datetime] = None) -> bool:
         """检查是否在睡眠时间段内"""
-        sleep_enabled = self.config.get('sleep_settings.enabled', True)
-        if not sleep_enabled:
+        sleep_settings = self.config.settings.sleep_settings
+        if not sleep_settings.enabled:
             return False
         
-        now = datetime.now()
+        now = now or datetime.now()
         current_hour = now.hour
-        start_hour = self.config.get('sleep_settings.start_hour', 23)
-        end_hour = self.config.get('sleep_settings.end_hour', 6)
+        start_hour = sleep_settings.start_hour
+        end_hour = sleep_settings.end_hour
         
         # 处理跨天情况
         if start_hour > end_hour:
@@ -62,89 +132,63 @@ class OLEDMonitor:
         else:
             return start_hour <= current_hour < end_hour
     
-    def calculate_wait_time(self) -> int:
-        """计算等待时间"""
+    def seconds_until_window_change(self) -> float:
+        """距下一次显示/睡眠时间段切换的秒数（时间段按整点划分，最多返回一小时以便重新读取配置）"""
         now = datetime.now()
-        current_hour = now.hour
-        
-        # 计算到下一个显示时间段开始的时间
-        start_hour = self.config.get('display_settings.start_hour', 10)
-        
-        if current_hour < start_hour:
-            wait_hours = start_hour - current_hour - 1
-            wait_minutes = 60 - now.minute
-        else:
-            wait_hours = 24 - current_hour + start_hour - 1
-            wait_minutes = 60 - now.minute
-        
-        wait_seconds = wait_hours * 3600 + wait_minutes * 60 - now.second
-        return max(60, min(wait_seconds, 3600))
+        state = (self.is_sleep_time(now), self.is_display_time(now))
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        for i in range(1, 25):
+            boundary = hour + timedelta(hours=i)
+            if (self.is_sleep_time(boundary), self.is_display_time(boundary)) != state:
+                return min((boundary - now).total_seconds(), 3600.0)
+        return 3600.0
     
     def handle_oled_connection(self):
-        """处理OLED连接状态"""
-        if not self.oled_display:
-            return
-        
-        current_connected = self.oled_display.check_connection()
-        
-        # 设备连接状态变化处理
-        if current_connected and not self.oled_display.is_connected:
-            if self.oled_display.init_oled():
-                self.oled_display.is_connected = True
-                print("OLED设备已连接")
-        elif not current_connected and self.oled_display.is_connected:
-            print("OLED设备已断开")
-            self.oled_display.cleanup()
+        """处理OLED连接状态（断开由写入失败检测，缺失时按退避重连）"""
+        self.displays.ensure_connected()
     
     def run_display_mode(self):
-        """运行显示模式"""
-        system_info = self.system_monitor.collect_system_info()
-        
-        # 智能唤醒检查
-        if self.sleep_mode:
-            if self.system_monitor.should_wake_up(system_info):
-                print("系统活动，唤醒屏幕")
-                self.sleep_mode = False
-            else:
-                # 保持在睡眠模式
-                time.sleep(self.config.get('smart_wake.check_interval', 10))
-                return
-        
+        """运行显示模式（由帧调度器在整秒边界调用）"""
         # 处理OLED连接
         self.handle_oled_connection()
+        self.displays.power_on()
         
-        # 绘制显示内容
-        if self.oled_display and self.oled_display.is_connected and self.oled_display.device:
-            self.oled_display.draw_display(system_info)
+        # 采样线程对齐到同一边界，稍等本周期的快照以免显示上一秒的数据
+        snapshot = self.sampler.wait_for_update(self.last_seq, self.frame_scheduler.interval / 2)
+        self.last_seq = snapshot.seq
         
-        time.sleep(self.config.get('scan_interval', 1.0))
+        # 所有屏幕共用同一份快照
+        self.displays.draw(snapshot.data)
     
-    def run_sleep_mode(self):
-        """运行睡眠模式"""
-        if not self.sleep_mode:
-            print("进入睡眠模式")
-            self.sleep_mode = True
-            
-            # 关闭OLED显示
-            if self.oled_display:
-                self.oled_display.cleanup()
-        
-        # 检查是否应该唤醒
-        system_info = self.system_monitor.collect_system_info()
-        if self.system_monitor.should_wake_up(system_info):
-            print("系统活动，唤醒屏幕")
-            self.sleep_mode = False
+    def enter_sleep(self):
+        """进入睡眠：面板进入显示关闭状态，采样降频"""
+        if self.sleep_mode:
             return
-        
-        # 睡眠模式下减少系统负载
-        wait_seconds = self.config.get('smart_wake.check_interval', 10)
-        print(f"睡眠中，{wait_seconds}秒后重新检查...")
-        
-        # 分段等待，便于响应退出信号
-        for i in range(wait_seconds):
-            if not self.running:
-                break
-            time.sleep(1)
+        print("进入睡眠模式")
+        self.sleep_mode = True
+        self.frame_scheduler.reset()
+        self.displays.power_off()
+        self.sampler.set_idle(True)
+    
+    def leave_sleep(self):
+        """退出睡眠：恢复采样频率，面板在下一帧重新开启"""
+        print("系统活动，唤醒屏幕")
+        self.sleep_mode = False
+        self.wake_detector.stop()
+        self.sampler.set_idle(False)
+    
+    def run_sleep_mode(self):
+        """运行睡眠模式：睡眠时间段内屏幕保持关闭，阻塞到时间段结束"""
+        self.enter_sleep()
+        self.stop_event.wait(self.seconds_until_window_change())
+    
+    def run_wake_check(self):
+        """显示时间段内的睡眠：轻量检测系统活动（PSI触发或定时读取计数器）"""
+        if not self.wake_detector.active:
+            self.wake_detector.start()
+        timeout = min(self.config.get('smart_wake.check_interval', 1.0), self.seconds_until_window_change())
+        if self.wake_detector.wait(timeout, self.stop_event):
+            self.leave_sleep()
     
     def run(self):
         """主运行循环"""
@@ -157,34 +201,49 @@ class OLEDMonitor:
             print(f"睡眠时间段: {self.config.get('sleep_settings.start_hour', 23):02d}:00 ~ {self.config.get('sleep_settings.end_hour', 6):02d}:00")
         if self.config.get('smart_wake.enabled', True):
             print("智能唤醒已启用")
+        if PERF.enabled:
+            print("性能插桩已启用")
+            PERF.start_reporting(float(self.config.get('perf.log_interval', 300)))
+        
+        self.config_watcher.start()
+        
+        if self.player:
+            self.run_replay()
+            return
         
-        # 启动Web服务器
+        # 启动采样线程和Web服务器
+        self.sampler.start()
+        self.displays.start()
+        if self.fleet_hub:
+            self.fleet_hub.start()
         self.web_server.start()
         
         try:
             while self.running:
                 # 检查睡眠时间段
                 if self.is_sleep_time():
+                    self.frame_scheduler.reset()
                     self.run_sleep_mode()
                     continue
                 
                 # 检查显示时间段
                 if self.is_display_time():
+                    if self.sleep_mode:
+                        self.run_wake_check()
+                        continue
+                    if not self.frame_scheduler.wait(self.stop_event):
+                        break
                     self.run_display_mode()
                 else:
+                    self.frame_scheduler.reset()
                     # 不在显示时间段，进入等待
-                    if self.oled_display and self.oled_display.is_connected and self.oled_display.device:
+                    if self.displays.powered:
                         print("不在显示时间段，关闭屏幕")
-                        self.oled_display.cleanup()
+                        self.displays.power_off()
                     
-                    wait_seconds = self.calculate_wait_time()
-                    print(f"不在显示时间段，等待 {wait_seconds//60} 分钟")
-                    
-                    # 分段等待，便于响应退出信号
-                    for i in range(wait_seconds):
-                        if not self.running:
-                            break
-                        time.sleep(1)
+                    wait_seconds = self.seconds_until_window_change()
+                    print(f"不在显示时间段，等待 {wait_seconds/60:.0f} 分钟")
+                    self.stop_event.wait(wait_seconds)
         
         except KeyboardInterrupt:
             print("\n程序被用户中断")
@@ -193,24 +252,72 @@ class OLEDMonitor:
         finally:
             self.shutdown()
     
+    def run_replay(self):
+        """回放模式：逐条发布轨迹中的快照并立即绘制，不受显示/睡眠时间段影响"""
+        print(f"回放快照轨迹: {self.player.path}（{'实时' if self.player.realtime else '最快速度'}）")
+        self.displays.start()
+        self.web_server.start()
+        start = time.monotonic()
+        try:
+            for info in self.player.play(self.stop_event):
+                self.handle_oled_connection()
+                self.displays.power_on()
+                snapshot = self.sampler.publish(info)
+                self.displays.draw(snapshot.data)
+        except KeyboardInterrupt:
+            print("\n程序被用户中断")
+        except Exception as e:
+            print(f"回放失败: {e}")
+        finally:
+            elapsed = time.monotonic() - start
+            played = self.player.played
+            rate = played / elapsed if elapsed > 0 else 0.0
+            print(f"回放结束: {played} 条快照，用时 {elapsed:.2f} 秒（{rate:.1f} 条/秒）")
+            self.shutdown()
+    
     def shutdown(self):
         """关闭程序"""
         print("程序关闭中...")
         self.running = False
+        self.stop_event.set()
+        self.config_watcher.stop()
         
         # 确保清理OLED资源
-        if self.oled_display:
-            self.oled_display.cleanup()
+        self.displays.stop()
+        self.displays.cleanup()
         
         self.web_server.stop()
+        if self.fleet_hub:
+            self.fleet_hub.stop()
+        self.sampler.stop()
+        self.wake_detector.stop()
+        self.system_monitor.close()
+        if self.history_store:
+            self.history_store.close()
+        if self.trace_writer:
+            self.trace_writer.close()
+        PERF.stop_reporting()
         print("程序已退出")
 
 def main():
+    parser = argparse.ArgumentParser(description="OLED系统监控")
+    parser.add_argument('--config', default="config.json", help="配置文件路径")
+    parser.add_argument('--hub', action='store_true', help="启用集群汇总模式（节点列表见配置 fleet.nodes）")
+    parser.add_argument('--record', metavar='FILE', help="把采样快照记录到二进制轨迹文件")
+    parser.add_argument('--replay', metavar='FILE', help="回放轨迹文件代替实时采集")
+    parser.add_argument('--replay-speed', choices=['realtime', 'max'], default='realtime',
+                        help="回放速度：按记录间隔(realtime)或尽可能快(max)")
+    parser.add_argument('--replay-loop', action='store_true', help="循环回放")
+    args = parser.parse_args()
+    
     # 创建web目录
     Path("web").mkdir(exist_ok=True)
     
     # 创建监控实例并运行
-    monitor = OLEDMonitor()
+    player = None
+    if args.replay:
+        player = TracePlayer(args.replay, realtime=args.replay_speed == 'realtime', loop=args.replay_loop)
+    monitor = OLEDMonitor(args.config, hub=args.hub, record=args.record, player=player)
     monitor.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+import bisect
+import os
+import resource
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# 直方图桶上界（毫秒），最后一个桶为 +Inf
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+BUCKETS = tuple(ms / 1000 for ms in BUCKETS_MS)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class Histogram:
+    """固定桶延迟直方图（单位秒），记录只做一次二分查找和几次加法"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """按桶上界估算分位数（秒），落在 +Inf 桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'buckets_ms': list(BUCKETS_MS),
+            'counts': list(self.counts),
+        }
+
+
+class _Span:
+    """计时区间，退出时记录到对应直方图"""
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    """关闭插桩时使用的空区间"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class PerfRegistry:
+    """热路径插桩：按名称汇总延迟直方图，并跟踪本进程的CPU时间和RSS；关闭时 span() 只返回共享的空区间"""
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.reporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # 各调用方（日志汇总、调试接口）上一次调用时的 (单调时间, CPU时间)，互不影响各自的区间CPU占用
+        self._last_cpu: Dict[str, Tuple[float, float]] = {}
+        self._start_cpu = self._cpu_time()
+
+    def configure(self, enabled: bool):
+        self.enabled = bool(enabled)
+
+    def span(self, name: str):
+        """with PERF.span('name'): ... 计时一段代码"""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """记录一次耗时（秒）"""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    @staticmethod
+    def _cpu_time() -> float:
+        times = os.times()
+        return times.user + times.system
+
+    def process_stats(self, consumer: str = 'api') -> dict:
+        """本进程CPU时间、内存，以及该调用方自上次调用（首次为启动）以来的CPU占用"""
+        now = time.monotonic()
+        cpu = self._cpu_time()
+        with self.lock:
+            last_time, last_cpu = self._last_cpu.get(consumer, (self.started, self._start_cpu))
+            self._last_cpu[consumer] = (now, cpu)
+        elapsed = now - last_time
+
+        rss = None
+        try:
+            with open('/proc/self/statm') as f:
+                rss = int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            pass
+
+        return {
+            'cpu_seconds': round(cpu, 3),
+            'cpu_percent': round((cpu - last_cpu) / elapsed * 100, 2) if elapsed > 0 else 0.0,
+            'cpu_percent_avg': round(cpu / max(now - self.started, 1e-9) * 100, 2),
+            'rss_bytes': rss,
+            # Linux 下 ru_maxrss 单位为KB
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            'threads': threading.active_count(),
+        }
+
+    def snapshot(self) -> dict:
+        """/api/debug/perf 的返回数据"""
+        with self.lock:
+            spans = {name: h.to_dict() for name, h in sorted(self.histograms.items())}
+        return {
+            'enabled': self.enabled,
+            'uptime': round(time.monotonic() - self.started, 1),
+            'process': self.process_stats('api'),
+            'spans': spans,
+        }
+
+    def summary(self) -> str:
+        """日志用的单行汇总"""
+        process = self.process_stats('log')
+        rss = process['rss_bytes']
+        parts = [f"CPU {process['cpu_percent']:.1f}%",
+                 f"RSS {rss / 1048576:.1f}MB" if rss is not None else "RSS N/A"]
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                if h.count:
+                    parts.append(f"{name} n={h.count} p50={h.percentile(0.5) * 1000:.2f}ms "
+                                 f"p99={h.percentile(0.99) * 1000:.2f}ms max={h.max * 1000:.2f}ms")
+        return "性能统计: " + "; ".join(parts)
+
+    def start_reporting(self, interval: float):
+        """每 interval 秒在日志中输出一次汇总"""
+        if self.reporter or interval <= 0:
+            return
+        self._stop.clear()
+        self.reporter = threading.Thread(target=self._report_loop, args=(interval,), name="perf-reporter", daemon=True)
+        self.reporter.start()
+
+    def _report_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            print(self.summary())
+
+    def stop_reporting(self):
+        self._stop.set()
+        if self.reporter:
+            self.reporter.join(timeout=2)
+            self.reporter = None
+
+
+# 进程内共享的插桩注册表
+PERF = PerfRegistry()
@@ -0,0 +1,118 @@
+import threading
+from collections import namedtuple
+from typing import Callable, List, Optional
+
+from frame_scheduler import FrameScheduler
+from system_info import SystemInfo
+
+# 睡眠期间的采样周期（秒），仅用于Web和历史记录
+IDLE_INTERVAL = 30.0
+
+# 只读快照：seq 单调递增，data 为只读的 SystemInfo
+Snapshot = namedtuple('Snapshot', ['seq', 'timestamp', 'data'])
+
+
+class MetricSampler:
+    """后台采样线程，按固定频率发布只读快照供OLED和Web共享"""
+
+    def __init__(self, config_manager, system_monitor):
+        self.config = config_manager
+        self.system_monitor = system_monitor
+        self.snapshot: Optional[Snapshot] = None
+        self.listeners: List[Callable[[Snapshot], None]] = []
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self._seq = 0
+        self.idle = False
+        # 停止、切换空闲状态或采样周期变化时中断等待
+        self._wakeup = threading.Event()
+        # 采样与显示帧对齐到同一整秒边界
+        self.scheduler = FrameScheduler(self._interval())
+        self._updated = threading.Condition()
+        self.config.subscribe(self.on_config_change, 'scan_interval')
+
+    def add_listener(self, callback: Callable[[Snapshot], None]):
+        """注册快照发布回调（在采样线程中调用）"""
+        self.listeners.append(callback)
+
+    def _interval(self) -> float:
+        """采样周期（秒）"""
+        interval = max(0.1, float(self.config.get('scan_interval', 1.0)))
+        return max(interval, IDLE_INTERVAL) if self.idle else interval
+
+    def on_config_change(self, changed):
+        """采样周期变化时中断当前等待，按新周期重新对齐"""
+        self._wakeup.set()
+
+    def set_idle(self, idle: bool):
+        """睡眠期间降低采样频率，唤醒后立即恢复"""
+        if idle != self.idle:
+            self.idle = idle
+            self._wakeup.set()
+
+    def latest(self) -> Optional[Snapshot]:
+        """获取最新快照（O(1)，无锁读取引用）"""
+        return self.snapshot
+
+    def wait_for_update(self, last_seq: int, timeout: float) -> Optional[Snapshot]:
+        """等待比 last_seq 更新的快照，超时返回当前快照"""
+        with self._updated:
+            if self.snapshot is None or self.snapshot.seq <= last_seq:
+                self._updated.wait(timeout)
+            return self.snapshot
+
+    def sample_once(self) -> Snapshot:
+        """采集一次并发布快照"""
+        return self.publish(self.system_monitor.collect_system_info())
+
+    def publish(self, info: SystemInfo) -> Snapshot:
+        """发布一份快照（回放时由轨迹直接调用，不启动采样线程）"""
+        self._seq += 1
+        snapshot = Snapshot(self._seq, info.timestamp, info)
+        with self._updated:
+            self.snapshot = snapshot
+            self._updated.notify_all()
+
+        for callback in self.listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"快照回调执行失败: {e}")
+        return snapshot
+
+    def start(self):
+        """启动采样线程"""
+        if self.running:
+            return
+        self.running = True
+        self._wakeup.clear()
+        # 先同步采集一次，保证消费者启动后立即有数据
+        self.sample_once()
+        self.thread = threading.Thread(target=self._run, name="metric-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        """采样循环（超时后跳过错过的周期而不是连续补采）"""
+        while self.running:
+            self.scheduler.interval = self._interval()
+            if not self.scheduler.wait(self._wakeup):
+                if not self.running:
+                    break
+                # 空闲状态切换或采样周期变化：按新周期重新对齐
+                self._wakeup.clear()
+                self.scheduler.reset()
+                continue
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"系统信息采集失败: {e}")
+
+    def stop(self):
+        """停止采样线程"""
+        self.running = False
+        self._wakeup.set()
+        with self._updated:
+            self._updated.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -0,0 +1,217 @@
+import math
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from system_info import SystemInfo
+
+# 文件头：魔数 + 版本号
+MAGIC = b'OLEDTRC'
+VERSION = 1
+
+# 记录头: 记录体长度(u16)
+_LENGTH = struct.Struct('<H')
+# 记录体固定部分: 标志, 时间戳, cpu/iowait/steal/softirq/频率/内存占比, 已用/总内存, 温度, 上传/下载, 核数
+_FIXED = struct.Struct('<BdffffffQQfffB')
+
+# 标志位：本条记录携带网络身份 / 传感器名称（与上一条相同时省略）
+FLAG_IDENTITY = 1
+FLAG_SENSOR_LABELS = 2
+
+# 缓冲写入，最多丢失这么久的记录（秒）
+FLUSH_INTERVAL = 5.0
+
+
+def _float(value: Optional[float]) -> float:
+    return float('nan') if value is None else value
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _pack_str(value: Optional[str]) -> bytes:
+    """u8长度 + UTF-8，None 记为 0xFF"""
+    if value is None:
+        return b'\xff'
+    data = value.encode('utf-8')[:254]
+    return bytes((len(data),)) + data
+
+
+def _unpack_str(buf: bytes, offset: int) -> Tuple[Optional[str], int]:
+    length = buf[offset]
+    if length == 0xFF:
+        return None, offset + 1
+    end = offset + 1 + length
+    return buf[offset + 1:end].decode('utf-8', 'replace'), end
+
+
+class TraceWriter:
+    """把快照流写成紧凑的二进制轨迹：定长数值 + 每核占用(0.1%精度)，字符串只在变化时写入"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file: Optional[BinaryIO] = None
+        self.lock = threading.Lock()
+        self.records = 0
+        self.last_identity = None
+        self.last_labels = None
+        self.last_flush = 0.0
+
+    def open(self) -> bool:
+        try:
+            self.file = open(self.path, 'wb')
+            self.file.write(MAGIC + bytes((VERSION,)))
+            self.last_flush = time.monotonic()
+            print(f"开始记录快照轨迹: {self.path}")
+            return True
+        except OSError as e:
+            print(f"无法创建轨迹文件 {self.path}: {e}")
+            self.file = None
+            return False
+
+    def encode(self, info: SystemInfo) -> bytes:
+        """编码一条记录（不含长度头）"""
+        identity = (info.network_name, info.interface, info.ip)
+        sensors = info.sensors[:255]
+        labels = tuple((label, kind) for label, kind, _ in sensors)
+        flags = 0
+        if identity != self.last_identity:
+            flags |= FLAG_IDENTITY
+            self.last_identity = identity
+        if labels != self.last_labels:
+            flags |= FLAG_SENSOR_LABELS
+            self.last_labels = labels
+
+        cores = info.cpu_cores[:255]
+        parts = [
+            _FIXED.pack(flags, info.timestamp, info.cpu_usage, info.cpu_iowait, info.cpu_steal,
+                        info.cpu_softirq, info.cpu_freq, info.mem_usage, info.mem_used, info.mem_total,
+                        _float(info.cpu_temp), _float(info.net_upload), _float(info.net_download), len(cores)),
+            struct.pack(f'<{len(cores)}H', *(int(round(min(max(c, 0.0), 100.0) * 10)) for c in cores)),
+            bytes((len(labels),)),
+            struct.pack(f'<{len(labels)}f', *(temp for _, _, temp in sensors)),
+        ]
+        if flags & FLAG_IDENTITY:
+            parts.extend(_pack_str(value) for value in identity)
+        if flags & FLAG_SENSOR_LABELS:
+            for label, kind in labels:
+                parts.append(_pack_str(label) + _pack_str(kind))
+        return b''.join(parts)
+
+    def on_snapshot(self, snapshot):
+        """采样线程回调"""
+        with self.lock:
+            if self.file is None:
+                return
+            try:
+                body = self.encode(snapshot.data)
+                self.file.write(_LENGTH.pack(len(body)) + body)
+                self.records += 1
+                now = time.monotonic()
+                if now - self.last_flush >= FLUSH_INTERVAL:
+                    self.file.flush()
+                    self.last_flush = now
+            except (OSError, struct.error) as e:
+                print(f"写入快照轨迹失败，停止记录: {e}")
+                self._close()
+
+    def _close(self):
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        self.file = None
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self._close()
+                print(f"快照轨迹已保存: {self.path}，共 {self.records} 条")
+
+
+def read_trace(path: str) -> Iterator[SystemInfo]:
+    """逐条读取轨迹文件，文件末尾不完整的记录忽略"""
+    with open(path, 'rb') as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} 不是快照轨迹文件")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"不支持的轨迹版本: {header[len(MAGIC)]}")
+
+        identity = (None, None, None)
+        labels: List[Tuple[Optional[str], Optional[str]]] = []
+        while True:
+            head = f.read(_LENGTH.size)
+            if len(head) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(head)
+            buf = f.read(length)
+            if len(buf) < length:
+                return
+
+            (flags, timestamp, cpu_usage, iowait, steal, softirq, cpu_freq, mem_usage,
+             mem_used, mem_total, cpu_temp, net_upload, net_download, core_count) = _FIXED.unpack_from(buf)
+            offset = _FIXED.size
+            cores = tuple(v / 10 for v in struct.unpack_from(f'<{core_count}H', buf, offset))
+            offset += 2 * core_count
+            sensor_count = buf[offset]
+            temps = struct.unpack_from(f'<{sensor_count}f', buf, offset + 1)
+            offset += 1 + 4 * sensor_count
+
+            if flags & FLAG_IDENTITY:
+                values = []
+                for _ in range(3):
+                    value, offset = _unpack_str(buf, offset)
+                    values.append(value)
+                identity = tuple(values)
+            if flags & FLAG_SENSOR_LABELS:
+                labels = []
+                for _ in range(sensor_count):
+                    label, offset = _unpack_str(buf, offset)
+                    kind, offset = _unpack_str(buf, offset)
+                    labels.append((label, kind))
+            sensor_labels = labels if len(labels) == sensor_count else [('sensor', 'other')] * sensor_count
+
+            yield SystemInfo(
+                timestamp=timestamp,
+                cpu_usage=cpu_usage, cpu_cores=cores,
+                cpu_iowait=iowait, cpu_steal=steal, cpu_softirq=softirq, cpu_freq=cpu_freq,
+                mem_usage=mem_usage, mem_used=mem_used, mem_total=mem_total,
+                cpu_temp=_optional(cpu_temp),
+                sensors=tuple((label, kind, temp) for (label, kind), temp in zip(sensor_labels, temps)),
+                network_name=identity[0], interface=identity[1], ip=identity[2],
+                net_upload=_optional(net_upload), net_download=_optional(net_download),
+            )
+
+
+class TracePlayer:
+    """回放轨迹：realtime 按记录间隔回放，否则尽可能快地输出"""
+
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.played = 0
+
+    def play(self, stop_event: threading.Event) -> Iterator[SystemInfo]:
+        """按节奏逐条产出快照，stop_event 置位时结束"""
+        while not stop_event.is_set():
+            first = None
+            start = time.monotonic()
+            count = 0
+            for info in read_trace(self.path):
+                if stop_event.is_set():
+                    return
+                if self.realtime:
+                    if first is None:
+                        first = info.timestamp
+                    delay = start + (info.timestamp - first) - time.monotonic()
+                    if delay > 0 and stop_event.wait(delay):
+                        return
+                count += 1
+                self.played += 1
+                yield info
+            if not self.loop or count == 0:
+                return
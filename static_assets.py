@@ -0,0 +1,167 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+# 可选的 brotli 压缩
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 带指纹的URL内容永不变化，浏览器可缓存一年且无需重新验证
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# 页面和未带指纹的URL每次都要验证，未变化时返回304
+REVALIDATE = 'no-cache'
+
+# 小于该长度的文件不压缩
+MIN_COMPRESS_SIZE = 256
+
+# 页面中对静态资源的引用: href="static/style.css" / src="/static/script.js"
+_REFERENCE = re.compile(r'(href|src)="(/?)static/([^"?#]+)"')
+
+
+class Asset:
+    """一个静态文件的内存副本：原文与各压缩版本、强ETag"""
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if self.mimetype.startswith('text/') or self.mimetype in ('application/javascript', 'application/json'):
+            self.mimetype += '; charset=utf-8'
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.fingerprinted = f"{stem}.{self.digest}{ext}"
+
+        # 编码 -> (内容, ETag)；不同编码是不同的表示，ETag 各自独立
+        self.variants: Dict[str, Tuple[bytes, str]] = {'identity': (body, f'"{self.digest}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            # mtime 固定为0，同样的内容压缩结果一致
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants['gzip'] = (compressed, f'"{self.digest}-gz"')
+            if BROTLI_AVAILABLE:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants['br'] = (compressed, f'"{self.digest}-br"')
+
+    @property
+    def etags(self):
+        return [etag for _, etag in self.variants.values()]
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """解析 Accept-Encoding，返回 编码 -> q 值"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def etag_matches(header: str, etags) -> bool:
+    """If-None-Match 是否命中（弱比较，* 匹配任意）"""
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+class StaticAssets:
+    """启动时把 web 目录载入内存并预压缩，页面中的资源引用改写为带指纹的URL，之后不再读取磁盘"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.assets: Dict[str, Asset] = {}
+        # 带指纹的文件名 -> 资源
+        self.by_fingerprint: Dict[str, Asset] = {}
+        self.load()
+
+    def load(self):
+        """载入 web 目录；目录缺失或文件无法读取时不影响监控运行，所有请求返回404"""
+        try:
+            files = {}
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name)
+                if os.path.isfile(path):
+                    with open(path, 'rb') as f:
+                        files[name] = f.read()
+
+            # 先处理被引用的资源，页面里才能写入它们的指纹
+            assets = {name: Asset(name, body) for name, body in files.items() if not name.endswith('.html')}
+            for name, body in files.items():
+                if name.endswith('.html'):
+                    assets[name] = Asset(name, self.rewrite(body, assets))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"无法载入静态资源 {self.root}: {e}，网页将不可用")
+            self.assets = {}
+            self.by_fingerprint = {}
+            return
+
+        self.assets = assets
+        self.by_fingerprint = {asset.fingerprinted: asset for asset in assets.values()}
+        total = sum(len(asset.variants['identity'][0]) for asset in assets.values())
+        compressed = sum(min(len(body) for body, _ in asset.variants.values()) for asset in assets.values())
+        print(f"静态资源已载入内存: {len(assets)} 个文件，{total} 字节（压缩后 {compressed} 字节）")
+
+    @staticmethod
+    def rewrite(body: bytes, assets: Dict[str, Asset]) -> bytes:
+        """把页面中的 static/xxx 引用替换为带指纹的绝对路径"""
+        def replace(match):
+            asset = assets.get(match.group(3))
+            if asset is None:
+                return match.group(0)
+            return f'{match.group(1)}="/static/{asset.fingerprinted}"'
+        return _REFERENCE.sub(replace, body.decode('utf-8')).encode('utf-8')
+
+    def lookup(self, name: str) -> Tuple[Optional[Asset], bool]:
+        """按文件名或带指纹的文件名查找，返回 (资源, 是否为指纹URL)"""
+        asset = self.by_fingerprint.get(name)
+        if asset is not None:
+            return asset, True
+        return self.assets.get(name), False
+
+    def respond(self, name: str, request_headers, response_class):
+        """生成响应：协商压缩编码，ETag 命中时返回304"""
+        asset, immutable = self.lookup(name)
+        if asset is None:
+            return response_class('Not Found', status=404, mimetype='text/plain')
+
+        accepted = parse_accept_encoding(request_headers.get('Accept-Encoding', ''))
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and accepted.get(candidate, 0) > 0:
+                encoding = candidate
+                break
+        body, etag = asset.variants[encoding]
+
+        headers = {
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE if immutable else REVALIDATE,
+            'Vary': 'Accept-Encoding',
+        }
+        if_none_match = request_headers.get('If-None-Match')
+        if if_none_match and etag_matches(if_none_match, asset.etags):
+            return response_class(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return response_class(body, status=200, headers=headers, content_type=asset.mimetype)
@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, Optional
+
+# 一个快照对应的状态：data 为状态字典（含 seq），body 为序列化后的完整响应
+StatusEntry = namedtuple('StatusEntry', ['seq', 'data', 'body', 'etag'])
+
+
+def _dumps(data: dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class StatusCache:
+    """/api/status 响应缓存：每个快照只生成和序列化一次，并保留最近若干个状态用于增量响应"""
+
+    # 可作为增量基准的历史快照数
+    HISTORY = 32
+
+    def __init__(self, build_status: Callable[[object], dict]):
+        self.build_status = build_status
+        # 进程启动标识，重启后序号重新计数也不会与旧ETag混淆
+        self.token = f"{int(time.time() * 1000):x}"
+        self.lock = threading.Lock()
+        self.current: Optional[StatusEntry] = None
+        self.history: "OrderedDict[int, dict]" = OrderedDict()
+        # 当前快照相对各基准序号的增量响应
+        self.deltas: Dict[int, bytes] = {}
+
+    def etag(self, seq: int) -> str:
+        return f'"{self.token}-{seq}"'
+
+    def get(self, snapshot) -> StatusEntry:
+        """获取快照对应的状态，同一快照只生成一次；比当前更旧的快照返回当前状态，序号不会倒退"""
+        with self.lock:
+            entry = self.current
+            if entry is None or snapshot.seq > entry.seq:
+                data = self.build_status(snapshot)
+                data['seq'] = snapshot.seq
+                entry = StatusEntry(snapshot.seq, data, _dumps(data), self.etag(snapshot.seq))
+                self.current = entry
+                self.deltas = {}
+                self.history[snapshot.seq] = data
+                while len(self.history) > self.HISTORY:
+                    self.history.popitem(last=False)
+            return entry
+
+    def delta(self, snapshot, since: int) -> Optional[bytes]:
+        """相对 since 序号只包含变化字段的响应；基准已不在历史中时返回None"""
+        entry = self.get(snapshot)
+        with self.lock:
+            body = self.deltas.get(since)
+            if body is not None:
+                return body
+            base = self.history.get(since)
+            if base is None or entry is not self.current:
+                return None
+            changes = {key: value for key, value in entry.data.items()
+                       if key != 'seq' and base.get(key) != value}
+            body = _dumps({'seq': entry.seq, 'since': since, 'delta': True, 'changes': changes})
+            self.deltas[since] = body
+            return body
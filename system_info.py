@@ -0,0 +1,68 @@
+from typing import Dict, Optional, Tuple
+
+
+class SystemInfo:
+    """一次采样的原始数值快照（只读），格式化在显示端完成"""
+
+    __slots__ = (
+        'timestamp',
+        'cpu_usage', 'cpu_cores', 'cpu_iowait', 'cpu_steal', 'cpu_softirq', 'cpu_freq',
+        'mem_usage', 'mem_used', 'mem_total',
+        'cpu_temp', 'sensors',
+        'network_name', 'interface', 'ip', 'net_upload', 'net_download',
+    )
+
+    # 各字段单位
+    UNITS = {
+        'timestamp': 's',
+        'cpu_usage': '%', 'cpu_cores': '%', 'cpu_iowait': '%', 'cpu_steal': '%', 'cpu_softirq': '%',
+        'cpu_freq': 'MHz',
+        'mem_usage': '%', 'mem_used': 'B', 'mem_total': 'B',
+        'cpu_temp': '°C', 'sensors': '°C',
+        'net_upload': 'B/s', 'net_download': 'B/s',
+    }
+
+    # 记录到历史中的数值字段（cpu_cores 展开为 cpu_cores_0 ...）
+    NUMERIC_FIELDS = (
+        'cpu_usage', 'cpu_iowait', 'cpu_steal', 'cpu_softirq', 'cpu_freq',
+        'mem_usage', 'mem_used', 'mem_total', 'cpu_temp', 'net_upload', 'net_download',
+    )
+
+    def __init__(self, timestamp: float,
+                 cpu_usage: float = 0.0, cpu_cores: Tuple[float, ...] = (),
+                 cpu_iowait: float = 0.0, cpu_steal: float = 0.0, cpu_softirq: float = 0.0,
+                 cpu_freq: float = 0.0,
+                 mem_usage: float = 0.0, mem_used: int = 0, mem_total: int = 0,
+                 cpu_temp: Optional[float] = None, sensors: Tuple[Tuple[str, str, float], ...] = (),
+                 network_name: Optional[str] = None, interface: Optional[str] = None,
+                 ip: Optional[str] = None,
+                 net_upload: Optional[float] = None, net_download: Optional[float] = None):
+        values = locals()
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SystemInfo 为只读快照")
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"SystemInfo({fields})"
+
+    def to_dict(self) -> Dict[str, object]:
+        """转换为可JSON序列化的字典（数值保持原始单位）"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['cpu_cores'] = list(self.cpu_cores)
+        data['sensors'] = [{'label': label, 'kind': kind, 'temp': temp}
+                           for label, kind, temp in self.sensors]
+        return data
+
+    def numeric_values(self) -> Dict[str, float]:
+        """历史记录用的数值指标，缺失值（None）跳过"""
+        values = {}
+        for name in self.NUMERIC_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                values[name] = float(value)
+        for i, value in enumerate(self.cpu_cores):
+            values[f"cpu_cores_{i}"] = float(value)
+        return values
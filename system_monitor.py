@@ -1,24 +1,48 @@
 import time
 import socket
+import threading
 import psutil
 import subprocess
-from datetime import datetime
-import os
-from typing import Tuple, Dict
+from typing import Any, Callable, Dict, Tuple, Optional
+
+from cpu_stat import CPUStatSampler
+from network_watcher import NetworkWatcher
+from perf import PERF
+from system_info import SystemInfo
+from thermal_sensors import ThermalRegistry
 
 class SystemMonitor:
+    # 各采集项默认刷新间隔（秒），可由 config.json 的 refresh_intervals 覆盖
+    REFRESH_INTERVALS = {
+        'cpu': 1.0,
+        'network_speed': 1.0,
+        'memory': 2.0,
+        'cpu_freq': 5.0,
+        'temperature': 5.0,
+        'network_info': 30.0,
+    }
+    
     def __init__(self, config_manager):
         self.config = config_manager
         self.prev_net_stats = {}
         self.current_interface = None
         self.start_time = time.time()
+        self.cpu_stat = CPUStatSampler()
+        self.thermal = ThermalRegistry(self.config.get('temperature_paths', []))
+        # 网络身份缓存，由 NetworkWatcher 的变化计数驱动失效
+        self.network_watcher = NetworkWatcher()
+        self.net_generation = -1
+        # 采集项TTL缓存: 名称 -> (过期时间(单调时钟), 值)
+        self.cache: Dict[str, Tuple[float, Any]] = {}
+        # 网络速度依赖上一次计数，采集过程需串行化
+        self.lock = threading.Lock()
     
-    def get_wifi_ssid(self, interface: str) -> str:
-        """获取WiFi SSID"""
+    def get_wifi_ssid(self, interface: str) -> Optional[str]:
+        """获取WiFi SSID，未连接返回None"""
         try:
             result = subprocess.run(['iwgetid', '-r'], capture_output=True, text=True, timeout=2)
             if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()[:12]
+                return result.stdout.strip()
             
             result = subprocess.run(['iwconfig', interface], capture_output=True, text=True, timeout=2)
             if result.returncode == 0:
@@ -26,75 +50,113 @@ class SystemMonitor:
                     if 'ESSID:' in line:
                         ssid = line.split('ESSID:')[1].split('"')[1]
                         if ssid and ssid != 'off/any':
-                            return ssid[:12]
+                            return ssid
             
-            return "无WiFi"
+            return None
         except Exception:
-            return "无WiFi"
+            return None
+    
+    def get_default_route_interface(self) -> Optional[str]:
+        """从 /proc/net/route 读取默认路由所在接口（取最小metric）"""
+        best = None
+        try:
+            with open('/proc/net/route', 'r') as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    # Iface Destination Gateway Flags RefCnt Use Metric ...
+                    if len(fields) < 7 or fields[1] != '00000000':
+                        continue
+                    if not int(fields[3], 16) & 0x1:  # RTF_UP
+                        continue
+                    metric = int(fields[6])
+                    if best is None or metric < best[0]:
+                        best = (metric, fields[0])
+        except (OSError, ValueError):
+            return None
+        return best[1] if best else None
     
-    def get_network_info(self) -> Tuple[str, str, str]:
-        """获取网络信息"""
+    def resolve_network_identity(self) -> Tuple[Optional[str], Optional[str]]:
+        """解析活动接口及其IPv4地址"""
+        interfaces = psutil.net_if_addrs()
+        
+        interface = self.get_default_route_interface()
+        if interface:
+            for addr in interfaces.get(interface, []):
+                if addr.family == socket.AF_INET:
+                    return interface, addr.address
+        
+        # 回退：通过UDP连接推断出口地址（不实际发送数据）
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         try:
-            # 获取本地IP
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
             ip = s.getsockname()[0]
+        finally:
             s.close()
-            
-            # 查找网络接口
-            interfaces = psutil.net_if_addrs()
-            stats = psutil.net_if_stats()
-            
-            for interface, addrs in interfaces.items():
-                for addr in addrs:
-                    if addr.family == socket.AF_INET and addr.address == ip:
-                        if interface.startswith('wlan') or interface.startswith('wlp'):
-                            ssid = self.get_wifi_ssid(interface)
-                            self.current_interface = interface
-                            return ssid, ip[:13], interface
-                        else:
-                            self.current_interface = interface
-                            return interface[:12], ip[:13], interface
-            
-            self.current_interface = None
-            return "无网络", "无IP", "无接口"
+        for interface, addrs in interfaces.items():
+            for addr in addrs:
+                if addr.family == socket.AF_INET and addr.address == ip:
+                    return interface, ip
+        return None, None
+    
+    def refresh_interval(self, key: str) -> float:
+        """采集项的刷新间隔（秒）"""
+        return float(self.config.get(f'refresh_intervals.{key}', self.REFRESH_INTERVALS[key]))
+    
+    def cached(self, key: str, collect: Callable[[], Any]) -> Any:
+        """TTL缓存：未到刷新时间时返回上次的值，否则重新采集"""
+        now = time.monotonic()
+        entry = self.cache.get(key)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+        with PERF.span(f'collect.{key}'):
+            value = collect()
+        # 留出半个采样周期的余量，避免采样抖动使刷新推迟一整个周期
+        slack = float(self.config.get('scan_interval', 1.0)) / 2
+        self.cache[key] = (now + self.refresh_interval(key) - slack, value)
+        return value
+    
+    def get_network_info(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """获取网络信息 (名称, IP, 接口)，按 network_info 间隔刷新，网络变化时立即刷新"""
+        if not self.network_watcher.running:
+            self.network_watcher.start()
+        
+        generation = self.network_watcher.generation
+        if generation != self.net_generation:
+            self.net_generation = generation
+            self.cache.pop('network_info', None)
+        
+        network_name, ip, interface = self.cached('network_info', self.read_network_info)
+        self.current_interface = interface
+        return network_name, ip, interface
+    
+    def read_network_info(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """解析活动接口、IP，WiFi接口再读取SSID"""
+        try:
+            interface, ip = self.resolve_network_identity()
         except Exception:
-            self.current_interface = None
-            return "无网络", "无IP", "无接口"
+            interface, ip = None, None
+        if not interface:
+            return None, None, None
+        
+        if interface.startswith('wlan') or interface.startswith('wlp'):
+            return self.get_wifi_ssid(interface), ip, interface
+        
+        return interface, ip, interface
     
-    def get_network_speed(self) -> str:
-        """获取网络速度"""
+    def get_network_rates(self) -> Optional[Tuple[float, float]]:
+        """获取当前接口的上传/下载速率（字节/秒），出错返回None"""
         if not self.current_interface:
-            return "  0K   0K"
+            return 0.0, 0.0
         
         try:
             current_time = time.time()
             current_stats = psutil.net_io_counters(pernic=True).get(self.current_interface)
             
             if not current_stats:
-                return "  0K   0K"
+                return 0.0, 0.0
             
-            # 初始化或计算速度
-            if self.current_interface not in self.prev_net_stats:
-                self.prev_net_stats[self.current_interface] = {
-                    'bytes_sent': current_stats.bytes_sent,
-                    'bytes_recv': current_stats.bytes_recv,
-                    'time': current_time
-                }
-                return "  0K   0K"
-            
-            prev_stats = self.prev_net_stats[self.current_interface]
-            time_diff = current_time - prev_stats['time']
-            
-            if time_diff <= 0:
-                return "  0K   0K"
-            
-            # 计算速度
-            bytes_sent_diff = current_stats.bytes_sent - prev_stats['bytes_sent']
-            bytes_recv_diff = current_stats.bytes_recv - prev_stats['bytes_recv']
-            
-            upload_speed = bytes_sent_diff / time_diff / 128  # KB/s
-            download_speed = bytes_recv_diff / time_diff / 128  # KB/s
+            prev_stats = self.prev_net_stats.get(self.current_interface)
             
             # 更新历史数据
             self.prev_net_stats[self.current_interface] = {
@@ -103,115 +165,97 @@ class SystemMonitor:
                 'time': current_time
             }
             
-            # 格式化显示
-            def format_speed(speed):
-                if speed < 1024:
-                    return f"{speed:>5.1f}K"
-                else:
-                    return f"{speed/1024:>5.1f}M"
+            # 首次采样无法计算速度
+            if not prev_stats:
+                return 0.0, 0.0
             
-            upload_str = format_speed(upload_speed)
-            download_str = format_speed(download_speed)
+            time_diff = current_time - prev_stats['time']
+            if time_diff <= 0:
+                return 0.0, 0.0
             
-            return f"{upload_str} {download_str}"
+            upload_speed = (current_stats.bytes_sent - prev_stats['bytes_sent']) / time_diff
+            download_speed = (current_stats.bytes_recv - prev_stats['bytes_recv']) / time_diff
+            return upload_speed, download_speed
         
         except Exception:
-            return " N/A   N/A"
-    
-    def get_cpu_temperature(self) -> str:
-        """获取CPU温度"""
-        temp_paths = self.config.get('temperature_paths', [])
-        
-        for path in temp_paths:
-            if os.path.exists(path):
-                try:
-                    with open(path, 'r') as f:
-                        temp = float(f.read().strip()) / 1000
-                        return f"{temp:.1f}°C"
-                except Exception:
-                    continue
-        
-        # 尝试vcgencmd（树莓派）
+            return None
+    
+    def read_cpu_freq(self) -> float:
+        """当前CPU频率（MHz）"""
         try:
-            result = subprocess.run(['vcgencmd', 'measure_temp'], capture_output=True, text=True)
-            if result.returncode == 0:
-                temp_str = result.stdout.split('=')[1].split("'")[0]
-                return f"{float(temp_str):.1f}°C"
+            cpu_freq = psutil.cpu_freq()
+            return cpu_freq.current if cpu_freq else 0.0
         except Exception:
-            pass
-        
-        return "N/A"
+            return 0.0
+    
+    def read_temperatures(self) -> Tuple[Optional[float], tuple]:
+        """读取所有温度传感器，返回 (主温度, 传感器读数)"""
+        readings = self.thermal.read_all()
+        return self.thermal.primary(readings), tuple(readings)
     
-    def collect_system_info(self) -> Dict[str, any]:
+    def collect_system_info(self) -> SystemInfo:
         """收集系统信息"""
-        info = {}
-        now = datetime.now()
-        
-        # 时间信息
-        info['time_str'] = now.strftime("%H:%M:%S")
-        info['date_str'] = now.strftime("%Y-%m-%d")
-        info['weekday_str'] = now.strftime("%a")
+        with self.lock, PERF.span('collect'):
+            return self._collect_system_info()
+    
+    def _collect_system_info(self) -> SystemInfo:
+        """收集系统信息（调用方需持有锁）"""
+        timestamp = time.time()
         
-        # CPU信息
-        info['cpu_usage'] = psutil.cpu_percent(interval=0.1)
-        try:
-            cpu_freq = psutil.cpu_freq()
-            info['cpu_freq'] = cpu_freq.current if cpu_freq else 0
-        except Exception:
-            info['cpu_freq'] = 0
+        # CPU信息（基于两次采样间的计数差值，不阻塞）
+        cpu = self.cached('cpu', self.cpu_stat.sample)
+        cpu_freq = self.cached('cpu_freq', self.read_cpu_freq)
         
         # 内存信息
-        mem = psutil.virtual_memory()
-        info['mem_usage'] = mem.percent
-        info['mem_used'] = mem.used / (1024**3)  # GB
-        info['mem_total'] = mem.total / (1024**3)  # GB
+        mem = self.cached('memory', psutil.virtual_memory)
         
-        # 温度信息
-        info['cpu_temp'] = self.get_cpu_temperature()
+        # 温度信息（所有传感器 + 主温度）
+        cpu_temp, readings = self.cached('temperature', self.read_temperatures)
         
         # 网络信息
         network_name, ip, interface = self.get_network_info()
-        info['network_name'] = network_name
-        info['ip'] = ip
-        info['net_speed'] = self.get_network_speed()
+        rates = self.cached('network_speed', self.get_network_rates)
         
-        return info
+        return SystemInfo(
+            timestamp=timestamp,
+            cpu_freq=cpu_freq,
+            mem_usage=mem.percent,
+            mem_used=mem.used,
+            mem_total=mem.total,
+            cpu_temp=cpu_temp,
+            sensors=readings,
+            network_name=network_name,
+            interface=interface,
+            ip=ip,
+            net_upload=rates[0] if rates else None,
+            net_download=rates[1] if rates else None,
+            **cpu
+        )
     
-    def get_uptime(self) -> str:
-        """获取运行时间"""
-        uptime_seconds = time.time() - self.start_time
-        hours = int(uptime_seconds // 3600)
-        minutes = int((uptime_seconds % 3600) // 60)
-        seconds = int(uptime_seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    def close(self):
+        """释放后台资源"""
+        self.network_watcher.stop()
+        self.thermal.close()
     
-    def should_wake_up(self, system_info: Dict) -> bool:
+    def get_uptime(self) -> float:
+        """获取运行时间（秒）"""
+        return time.time() - self.start_time
+    
+    def should_wake_up(self, system_info: SystemInfo) -> bool:
         """判断是否应该唤醒屏幕"""
+        return self.exceeds_wake_thresholds(system_info.cpu_usage, system_info.mem_usage, system_info.cpu_freq,
+                                            system_info.net_upload, system_info.net_download)
+    
+    def exceeds_wake_thresholds(self, cpu_usage: float, mem_usage: float, cpu_freq: float,
+                                net_upload: Optional[float], net_download: Optional[float]) -> bool:
+        """按智能唤醒阈值判断（睡眠期间的轻量检测也使用此规则）"""
         smart_wake_enabled = self.config.get('smart_wake.enabled', True)
         
         if not smart_wake_enabled:
             return True
         
-        # 检查各项阈值
-        cpu_usage = system_info['cpu_usage']
-        cpu_freq = system_info['cpu_freq']
-        mem_usage = system_info['mem_usage']
-        
-        # 解析网络速度
-        net_speed = system_info['net_speed']
-        upload_str, download_str = net_speed.split()[:2]
-        
-        def parse_speed(speed_str):
-            if speed_str.endswith('K'):
-                return float(speed_str[:-1])
-            elif speed_str.endswith('M'):
-                return float(speed_str[:-1]) * 1024
-            else:
-                return 0.0
-        
-        upload_speed = parse_speed(upload_str)
-        download_speed = parse_speed(download_str)
-        max_net_speed = max(upload_speed, download_speed)
+        # 网络速度阈值沿用屏幕显示的单位（字节/秒 ÷ 128）
+        max_net_speed = max(net_upload or 0.0, net_download or 0.0) / 128
         
         # 检查阈值
         thresholds = [
@@ -221,4 +265,4 @@ class SystemMonitor:
             cpu_freq > self.config.get('smart_wake.cpu_freq_threshold', 1000.0)
         ]
         
-        return any(thresholds)
\ No newline at end of file
+        return any(thresholds)
@@ -0,0 +1,190 @@
+import glob
+import os
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+# 按名称关键字归类传感器
+_KINDS = (
+    ('nvme', ('nvme',)),
+    ('wifi', ('wifi', 'wlan', 'iwlwifi', 'brcmfmac', 'mt76', 'ath', 'rtw')),
+    ('pmic', ('pmic', 'rp1', 'axp')),
+    ('soc', ('cpu', 'soc', 'x86_pkg', 'k10temp', 'coretemp', 'acpitz')),
+)
+
+
+def classify(label: str) -> str:
+    """根据名称推断传感器类别"""
+    name = label.lower()
+    for kind, keywords in _KINDS:
+        if any(k in name for k in keywords):
+            return kind
+    return 'other'
+
+
+class _Source:
+    """一个温度来源，保持打开的文件描述符并用 pread 读取"""
+
+    __slots__ = ('label', 'kind', 'path', 'configured', 'fd', 'failures', 'retry_at')
+
+    def __init__(self, label: str, path: str, configured: bool = False):
+        self.label = label
+        self.kind = classify(label)
+        self.path = path
+        self.configured = configured
+        self.fd: Optional[int] = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+class ThermalRegistry:
+    """温度传感器注册表：启动时发现一次，失败的来源按退避时间重新打开"""
+
+    BACKOFF_BASE = 2.0
+    BACKOFF_MAX = 300.0
+    VCGENCMD_INTERVAL = 5.0
+
+    def __init__(self, configured_paths: List[str], sysfs_root: str = "/sys/class"):
+        self.configured_paths = list(configured_paths or [])
+        self.sysfs_root = sysfs_root
+        self.sources: List[_Source] = []
+        self.rediscover_at = 0.0
+        self.rediscover_failures = 0
+        self.vcgencmd_at = 0.0
+        self.vcgencmd_failures = 0
+        self.vcgencmd_reading: Optional[float] = None
+        self.primary_temp: Optional[float] = None
+        self.discover()
+
+    @staticmethod
+    def _read_text(path: str) -> str:
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def discover(self):
+        """扫描配置路径、thermal_zone 和 hwmon 温度输入"""
+        self.close()
+        found = []
+        seen = set()
+
+        def add(label, path, configured=False):
+            real = os.path.realpath(path)
+            if real not in seen and os.path.exists(path):
+                seen.add(real)
+                found.append(_Source(label, path, configured))
+
+        zone_types = set()
+        for path in self.configured_paths:
+            zone = os.path.dirname(path)
+            label = self._read_text(os.path.join(zone, 'type')) or self._read_text(os.path.join(zone, 'name'))
+            add(label or os.path.basename(zone), path, configured=True)
+
+        for zone in sorted(glob.glob(os.path.join(self.sysfs_root, 'thermal', 'thermal_zone*'))):
+            zone_type = self._read_text(os.path.join(zone, 'type')) or os.path.basename(zone)
+            zone_types.add(zone_type.replace('-', '_'))
+            add(zone_type, os.path.join(zone, 'temp'))
+
+        for hwmon in sorted(glob.glob(os.path.join(self.sysfs_root, 'hwmon', 'hwmon*'))):
+            name = self._read_text(os.path.join(hwmon, 'name')) or os.path.basename(hwmon)
+            # thermal_zone 会在hwmon下镜像一份，避免重复上报
+            if name.replace('-', '_') in zone_types:
+                continue
+            for temp_input in sorted(glob.glob(os.path.join(hwmon, 'temp*_input'))):
+                sensor_label = self._read_text(temp_input.replace('_input', '_label'))
+                add(f"{name} {sensor_label}" if sensor_label else name, temp_input)
+
+        for source in found:
+            self._open(source)
+        self.sources = found
+        if found:
+            print(f"发现温度传感器: {', '.join(s.label for s in found)}")
+
+    def _open(self, source: _Source) -> bool:
+        try:
+            source.fd = os.open(source.path, os.O_RDONLY)
+            return True
+        except OSError:
+            self._fail(source, time.monotonic())
+            return False
+
+    def _fail(self, source: _Source, now: float):
+        if source.fd is not None:
+            try:
+                os.close(source.fd)
+            except OSError:
+                pass
+            source.fd = None
+        source.failures += 1
+        source.retry_at = now + min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (source.failures - 1)))
+
+    def read_all(self) -> List[Tuple[str, str, float]]:
+        """读取所有可用传感器 (label, kind, 摄氏度)"""
+        now = time.monotonic()
+        readings = []
+        self.primary_temp = None
+        for source in self.sources:
+            if source.fd is None:
+                if now < source.retry_at or not self._open(source):
+                    continue
+            try:
+                temp = int(os.pread(source.fd, 32, 0)) / 1000.0
+                readings.append((source.label, source.kind, temp))
+                source.failures = 0
+                if source.configured and self.primary_temp is None:
+                    self.primary_temp = temp
+            except (OSError, ValueError):
+                self._fail(source, now)
+
+        if not readings:
+            # 所有来源都失效时按退避重新发现，并尝试vcgencmd
+            if now >= self.rediscover_at:
+                self.rediscover_failures += 1
+                self.rediscover_at = now + min(self.BACKOFF_MAX,
+                                               self.BACKOFF_BASE * (2 ** self.rediscover_failures))
+                self.discover()
+            temp = self._read_vcgencmd(now)
+            if temp is not None:
+                readings.append(('vcgencmd', 'soc', temp))
+        else:
+            self.rediscover_failures = 0
+        return readings
+
+    def _read_vcgencmd(self, now: float) -> Optional[float]:
+        """树莓派固件温度，带超时和退避"""
+        if now < self.vcgencmd_at:
+            return self.vcgencmd_reading
+        try:
+            result = subprocess.run(['vcgencmd', 'measure_temp'], capture_output=True, text=True, timeout=2)
+            if result.returncode == 0:
+                self.vcgencmd_reading = float(result.stdout.split('=')[1].split("'")[0])
+                self.vcgencmd_failures = 0
+                self.vcgencmd_at = now + self.VCGENCMD_INTERVAL
+                return self.vcgencmd_reading
+        except Exception:
+            pass
+        self.vcgencmd_reading = None
+        self.vcgencmd_failures += 1
+        self.vcgencmd_at = now + min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** self.vcgencmd_failures))
+        return None
+
+    def primary(self, readings: List[Tuple[str, str, float]]) -> Optional[float]:
+        """主温度：优先配置路径中首个可用的，其次SoC类传感器，最后按发现顺序"""
+        if self.primary_temp is not None:
+            return self.primary_temp
+        for label, kind, temp in readings:
+            if kind == 'soc':
+                return temp
+        return readings[0][2] if readings else None
+
+    def close(self):
+        """关闭所有文件描述符"""
+        for source in self.sources:
+            if source.fd is not None:
+                try:
+                    os.close(source.fd)
+                except OSError:
+                    pass
+                source.fd = None
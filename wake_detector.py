@@ -0,0 +1,165 @@
+import glob
+import os
+import select
+import threading
+import time
+from typing import Dict, List, Optional
+
+from cpu_stat import CPUStatSampler
+
+# PSI触发：1秒窗口内CPU等待累计超过100毫秒时通知（需要 CONFIG_PSI，非root需窗口为2秒的整数倍）
+PSI_PATH = "/proc/pressure/cpu"
+PSI_TRIGGER = b"some 100000 1000000"
+PSI_TRIGGER_UNPRIVILEGED = b"some 200000 2000000"
+
+
+class WakeDetector:
+    """睡眠期间的轻量唤醒检测：只读取唤醒规则需要的计数器，有PSI时阻塞到出现负载"""
+
+    def __init__(self, system_monitor):
+        self.system_monitor = system_monitor
+        self.cpu_stat = CPUStatSampler()
+        self.psi_fd: Optional[int] = None
+        self.poller: Optional[select.poll] = None
+        self.fds: Dict[str, int] = {}
+        self.freq_fds: List[int] = []
+        self.prev_net = None
+        self.active = False
+
+    def start(self):
+        """进入睡眠：打开计数器文件并注册PSI触发"""
+        if self.active:
+            return
+        self.active = True
+        for name, path in (('meminfo', '/proc/meminfo'), ('net', '/proc/net/dev')):
+            try:
+                self.fds[name] = os.open(path, os.O_RDONLY)
+            except OSError:
+                pass
+        for path in sorted(glob.glob('/sys/devices/system/cpu/cpufreq/policy*/scaling_cur_freq')):
+            try:
+                self.freq_fds.append(os.open(path, os.O_RDONLY))
+            except OSError:
+                pass
+        self._open_psi()
+        # 建立计数基准，第一次检查即为睡眠期间的增量
+        self.cpu_stat.sample()
+        self.prev_net = None
+        self._net_rates()
+
+    def _open_psi(self):
+        """注册CPU压力触发器，内核不支持时退回定时检查"""
+        try:
+            fd = os.open(PSI_PATH, os.O_RDWR | os.O_NONBLOCK)
+        except OSError:
+            return
+        for trigger in (PSI_TRIGGER, PSI_TRIGGER_UNPRIVILEGED):
+            try:
+                os.write(fd, trigger + b'\0')
+                break
+            except OSError:
+                continue
+        else:
+            os.close(fd)
+            return
+        self.psi_fd = fd
+        self.poller = select.poll()
+        self.poller.register(fd, select.POLLPRI)
+
+    def _pread(self, name: str, size: int = 65536) -> Optional[bytes]:
+        fd = self.fds.get(name)
+        if fd is None:
+            return None
+        try:
+            return os.pread(fd, size, 0)
+        except OSError:
+            return None
+
+    def _read_mem_usage(self) -> float:
+        """内存使用率，与 psutil.virtual_memory().percent 的算法一致"""
+        data = self._pread('meminfo', 4096)
+        if not data:
+            return 0.0
+        values = {}
+        for line in data.split(b'\n'):
+            key, _, rest = line.partition(b':')
+            if key in (b'MemTotal', b'MemAvailable'):
+                values[key] = int(rest.split()[0])
+        total = values.get(b'MemTotal', 0)
+        if not total:
+            return 0.0
+        return (total - values.get(b'MemAvailable', total)) * 100.0 / total
+
+    def _read_cpu_freq(self) -> float:
+        """各频率策略当前频率的平均值（MHz）"""
+        freqs = []
+        for fd in self.freq_fds:
+            try:
+                freqs.append(int(os.pread(fd, 32, 0)) / 1000.0)
+            except (OSError, ValueError):
+                continue
+        return sum(freqs) / len(freqs) if freqs else 0.0
+
+    def _read_net_bytes(self):
+        """当前接口的 (发送, 接收) 字节数"""
+        interface = self.system_monitor.current_interface
+        data = self._pread('net')
+        if not interface or not data:
+            return None
+        prefix = interface.encode() + b':'
+        for line in data.split(b'\n'):
+            line = line.strip()
+            if line.startswith(prefix):
+                fields = line[len(prefix):].split()
+                return int(fields[8]), int(fields[0])
+        return None
+
+    def _net_rates(self):
+        """自上次检查以来的 (上传, 下载) 字节/秒"""
+        now = time.monotonic()
+        current = self._read_net_bytes()
+        prev, self.prev_net = self.prev_net, (now, current)
+        if current is None or prev is None or prev[1] is None or now <= prev[0]:
+            return 0.0, 0.0
+        elapsed = now - prev[0]
+        return (current[0] - prev[1][0]) / elapsed, (current[1] - prev[1][1]) / elapsed
+
+    def check(self) -> bool:
+        """读取轻量计数器并按唤醒阈值判断"""
+        upload, download = self._net_rates()
+        return self.system_monitor.exceeds_wake_thresholds(
+            cpu_usage=self.cpu_stat.sample()['cpu_usage'],
+            mem_usage=self._read_mem_usage(),
+            cpu_freq=self._read_cpu_freq(),
+            net_upload=upload,
+            net_download=download,
+        )
+
+    def wait(self, timeout: float, stop_event: threading.Event) -> bool:
+        """阻塞至PSI触发或超时，然后检查一次；需要唤醒时返回True"""
+        if self.poller is not None:
+            try:
+                self.poller.poll(max(0.0, timeout) * 1000)
+            except OSError:
+                stop_event.wait(timeout)
+        else:
+            stop_event.wait(timeout)
+        if stop_event.is_set():
+            return False
+        return self.check()
+
+    def stop(self):
+        """离开睡眠：注销PSI触发并关闭文件"""
+        self.active = False
+        fds = list(self.fds.values()) + self.freq_fds
+        if self.psi_fd is not None:
+            fds.append(self.psi_fd)
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+        self.freq_fds = []
+        self.psi_fd = None
+        self.poller = None
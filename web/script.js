@@ -1,74 +1,298 @@
-function updateDashboard(data) {
+const GB = 1024 * 1024 * 1024;
+
+// 接口返回原始数值，格式化在前端完成
+function formatDuration(seconds) {
+    const total = Math.floor(seconds);
+    const pad = n => String(n).padStart(2, '0');
+    return pad(Math.floor(total / 3600)) + ':' + pad(Math.floor(total % 3600 / 60)) + ':' + pad(total % 60);
+}
+
+function formatTemperature(temp) {
+    return temp === null ? 'N/A' : temp.toFixed(1) + '°C';
+}
+
+function formatSpeed(bytesPerSecond) {
+    // 与OLED显示保持一致：字节/秒 ÷ 128
+    if (bytesPerSecond === null) {
+        return 'N/A';
+    }
+    const speed = bytesPerSecond / 128;
+    return speed < 1024 ? speed.toFixed(1) + 'K' : (speed / 1024).toFixed(1) + 'M';
+}
+
+// 只在内容变化时写入DOM，避免无谓的重排
+function setText(id, text) {
+    const element = document.getElementById(id);
+    if (element.textContent !== text) {
+        element.textContent = text;
+    }
+}
+
+function setWidth(id, percent) {
+    const element = document.getElementById(id);
+    const width = percent + '%';
+    if (element.style.width !== width) {
+        element.style.width = width;
+    }
+}
+
+// changed 为增量响应中变化的字段，null 表示全部刷新
+function updateDashboard(data, changed) {
+    const has = (...keys) => !changed || keys.some(key => key in changed);
+
     // 系统概览
-    document.getElementById('current-time').textContent = data.time_str;
-    document.getElementById('uptime').textContent = data.uptime;
+    if (has('timestamp')) {
+        setText('current-time', new Date(data.timestamp * 1000).toLocaleTimeString('zh-CN', { hour12: false }));
+    }
+    if (has('uptime')) {
+        setText('uptime', formatDuration(data.uptime));
+    }
     
     // OLED状态
-    const oledStatus = document.getElementById('oled-status');
-    const oledText = document.getElementById('oled-text');
-    if (data.oled_connected) {
-        oledStatus.className = 'status-indicator status-online';
-        oledText.textContent = '在线';
-    } else {
-        oledStatus.className = 'status-indicator status-offline';
-        oledText.textContent = '离线';
+    if (has('oled_connected')) {
+        document.getElementById('oled-status').className =
+            'status-indicator ' + (data.oled_connected ? 'status-online' : 'status-offline');
+        setText('oled-text', data.oled_connected ? '在线' : '离线');
     }
 
     // CPU信息
-    document.getElementById('cpu-usage').textContent = data.cpu_usage.toFixed(1) + '%';
-    document.getElementById('cpu-freq').textContent = data.cpu_freq.toFixed(0) + ' MHz';
-    document.getElementById('cpu-temp').textContent = data.cpu_temp;
-    document.getElementById('cpu-progress').style.width = data.cpu_usage + '%';
+    if (has('cpu_usage')) {
+        setText('cpu-usage', data.cpu_usage.toFixed(1) + '%');
+        setWidth('cpu-progress', data.cpu_usage);
+    }
+    if (has('cpu_freq')) {
+        setText('cpu-freq', data.cpu_freq.toFixed(0) + ' MHz');
+    }
+    if (has('cpu_temp')) {
+        setText('cpu-temp', formatTemperature(data.cpu_temp));
+    }
+    if (has('cpu_iowait', 'cpu_steal', 'cpu_softirq')) {
+        setText('cpu-detail',
+            data.cpu_iowait.toFixed(1) + '% / ' + data.cpu_steal.toFixed(1) + '% / ' + data.cpu_softirq.toFixed(1) + '%');
+    }
+    if (has('cpu_cores')) {
+        setText('cpu-cores', data.cpu_cores.map(v => v.toFixed(0) + '%').join(' '));
+    }
+
+    // 温度传感器：传感器组成变化时才重建列表
+    const sensorList = document.getElementById('sensor-list');
+    if (has('sensors') && sensorList.children.length === data.sensors.length) {
+        data.sensors.forEach((sensor, i) => {
+            const [label, value] = sensorList.children[i].children;
+            if (label.textContent !== sensor.label) {
+                label.textContent = sensor.label;
+            }
+            const temp = formatTemperature(sensor.temp);
+            if (value.textContent !== temp) {
+                value.textContent = temp;
+            }
+        });
+    } else if (has('sensors')) {
+        sensorList.innerHTML = '';
+        data.sensors.forEach(sensor => {
+            const item = document.createElement('div');
+            item.className = 'info-item';
+            const label = document.createElement('span');
+            label.className = 'info-label';
+            label.textContent = sensor.label;
+            const value = document.createElement('span');
+            value.className = 'info-value';
+            value.textContent = formatTemperature(sensor.temp);
+            item.appendChild(label);
+            item.appendChild(value);
+            sensorList.appendChild(item);
+        });
+    }
 
     // 内存信息
-    document.getElementById('mem-usage').textContent = data.mem_usage.toFixed(1) + '%';
-    document.getElementById('mem-usage-detail').textContent = 
-        data.mem_used.toFixed(1) + ' GB / ' + data.mem_total.toFixed(1) + ' GB';
-    document.getElementById('mem-progress').style.width = data.mem_usage + '%';
+    if (has('mem_usage')) {
+        setText('mem-usage', data.mem_usage.toFixed(1) + '%');
+        setWidth('mem-progress', data.mem_usage);
+    }
+    if (has('mem_used', 'mem_total')) {
+        setText('mem-usage-detail',
+            (data.mem_used / GB).toFixed(1) + ' GB / ' + (data.mem_total / GB).toFixed(1) + ' GB');
+    }
 
     // 网络信息
-    document.getElementById('ip-address').textContent = data.ip;
-    document.getElementById('network-name').textContent = data.network_name;
-    
-    const speeds = data.net_speed.split(' ');
-    if (speeds.length >= 2) {
-        document.getElementById('upload-speed').textContent = speeds[0].trim();
-        document.getElementById('download-speed').textContent = speeds[1].trim();
+    if (has('ip')) {
+        setText('ip-address', data.ip || '无IP');
+    }
+    if (has('network_name', 'interface')) {
+        setText('network-name', data.network_name || (data.interface ? '无WiFi' : '无网络'));
+    }
+    if (has('net_upload')) {
+        setText('upload-speed', formatSpeed(data.net_upload));
+    }
+    if (has('net_download')) {
+        setText('download-speed', formatSpeed(data.net_download));
     }
 
     // 更新时间
-    document.getElementById('last-update-time').textContent = new Date().toLocaleString();
+    setText('last-update-time', new Date().toLocaleString());
+}
+
+// 当前完整状态及其序号/ETag，轮询时据此请求增量并在无变化时得到304
+let currentStatus = null;
+let statusEtag = null;
+
+function applyStatus(data) {
+    if (data.delta && currentStatus !== null && data.since === currentStatus.seq) {
+        currentStatus = Object.assign({}, currentStatus, data.changes, { seq: data.seq });
+        updateDashboard(currentStatus, data.changes);
+    } else if (!data.delta) {
+        currentStatus = data;
+        updateDashboard(currentStatus, null);
+    } else {
+        // 增量的基准与本地状态不一致，下次请求完整状态
+        currentStatus = null;
+        statusEtag = null;
+    }
 }
 
 function fetchData() {
-    fetch('/api/status')
+    const url = currentStatus === null ? '/api/status' : '/api/status?since=' + currentStatus.seq;
+    const headers = statusEtag && currentStatus !== null ? { 'If-None-Match': statusEtag } : {};
+    fetch(url, { headers: headers, cache: 'no-store' })
         .then(response => {
+            if (response.status === 304) {
+                setText('last-update-time', new Date().toLocaleString());
+                return null;
+            }
             if (!response.ok) {
                 throw new Error('Network response was not ok');
             }
+            statusEtag = response.headers.get('ETag');
             return response.json();
         })
-        .then(data => updateDashboard(data))
+        .then(data => {
+            if (data) {
+                applyStatus(data);
+            }
+        })
         .catch(error => {
             console.error('获取数据失败:', error);
-            // 显示错误状态
+            // 显示错误状态，恢复后重新获取完整状态
+            currentStatus = null;
+            statusEtag = null;
             document.getElementById('oled-text').textContent = '连接失败';
             document.getElementById('oled-status').className = 'status-indicator status-offline';
         });
 }
 
+function drawHistory(points) {
+    const canvas = document.getElementById('history-chart');
+    const ctx = canvas.getContext('2d');
+    const w = canvas.width, h = canvas.height, pad = 30;
+    ctx.clearRect(0, 0, w, h);
+    if (points.length < 2) {
+        ctx.fillStyle = '#a0aec0';
+        ctx.fillText('暂无数据', w / 2 - 20, h / 2);
+        return;
+    }
+
+    // 每个点: [时间, 平均, 最小, 最大]
+    const t0 = points[0][0], t1 = points[points.length - 1][0];
+    let lo = Infinity, hi = -Infinity;
+    points.forEach(p => { lo = Math.min(lo, p[2]); hi = Math.max(hi, p[3]); });
+    if (hi === lo) { hi = lo + 1; }
+    const x = t => pad + (t - t0) / (t1 - t0 || 1) * (w - 2 * pad);
+    const y = v => h - pad - (v - lo) / (hi - lo) * (h - 2 * pad);
+
+    // 最小/最大值区间
+    ctx.fillStyle = 'rgba(66, 153, 225, 0.2)';
+    ctx.beginPath();
+    points.forEach((p, i) => i ? ctx.lineTo(x(p[0]), y(p[3])) : ctx.moveTo(x(p[0]), y(p[3])));
+    for (let i = points.length - 1; i >= 0; i--) {
+        ctx.lineTo(x(points[i][0]), y(points[i][2]));
+    }
+    ctx.fill();
+
+    // 平均值曲线
+    ctx.strokeStyle = '#4299e1';
+    ctx.lineWidth = 2;
+    ctx.beginPath();
+    points.forEach((p, i) => i ? ctx.lineTo(x(p[0]), y(p[1])) : ctx.moveTo(x(p[0]), y(p[1])));
+    ctx.stroke();
+
+    ctx.fillStyle = '#4a5568';
+    ctx.fillText(hi.toFixed(1), 2, pad);
+    ctx.fillText(lo.toFixed(1), 2, h - pad);
+}
+
+function fetchHistory() {
+    const metric = document.getElementById('history-metric').value;
+    const range = parseInt(document.getElementById('history-range').value);
+    const now = Date.now() / 1000;
+    const points = document.getElementById('history-chart').width / 4;
+    fetch(`/api/history?metric=${metric}&from=${now - range}&to=${now}&points=${Math.floor(points)}`)
+        .then(response => response.ok ? response.json() : { points: [] })
+        .then(data => drawHistory(data.points))
+        .catch(error => console.error('获取历史数据失败:', error));
+}
+
+document.getElementById('history-metric').addEventListener('change', fetchHistory);
+document.getElementById('history-range').addEventListener('change', fetchHistory);
+
+// 实时推送：优先使用 /api/stream，不可用时退回轮询
+let eventSource = null;
+let updateInterval = null;
+let streamRetryTimer = null;
+
+function startPolling() {
+    if (!updateInterval) {
+        fetchData();
+        updateInterval = setInterval(fetchData, 3000);
+    }
+}
+
+function stopPolling() {
+    clearInterval(updateInterval);
+    updateInterval = null;
+}
+
+function connectStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    eventSource = new EventSource('/api/stream');
+    eventSource.onopen = () => stopPolling();
+    eventSource.onmessage = event => applyStatus(JSON.parse(event.data));
+    eventSource.onerror = () => {
+        // 推送中断：关闭连接改为轮询，30秒后再尝试推送
+        disconnectStream();
+        startPolling();
+        streamRetryTimer = setTimeout(connectStream, 30000);
+    };
+}
+
+function disconnectStream() {
+    clearTimeout(streamRetryTimer);
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+}
+
 // 初始加载
 fetchData();
+fetchHistory();
+connectStream();
 
-// 每3秒更新一次
-let updateInterval = setInterval(fetchData, 3000);
+// 历史曲线每30秒刷新
+let historyInterval = setInterval(fetchHistory, 30000);
 
-// 页面可见性变化时调整更新频率
+// 页面不可见时断开推送和轮询
 document.addEventListener('visibilitychange', function() {
     if (document.hidden) {
-        clearInterval(updateInterval);
+        disconnectStream();
+        stopPolling();
+        clearInterval(historyInterval);
     } else {
         fetchData();
-        updateInterval = setInterval(fetchData, 3000);
+        fetchHistory();
+        connectStream();
+        historyInterval = setInterval(fetchHistory, 30000);
     }
-});
\ No newline at end of file
+});
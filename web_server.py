@@ -1,56 +1,166 @@
+import os
 import threading
+import time
 from typing import Optional
 
+from event_stream import SnapshotBroadcaster
+from metrics_exporter import CONTENT_TYPE, MetricsExporter
+from perf import PERF
+from static_assets import StaticAssets, etag_matches
+from status_cache import StatusCache
+from wsgi_server import PooledWSGIServer
+
 # Web服务器
 try:
-    from flask import Flask, jsonify, send_from_directory, request
+    from flask import Flask, Response, g, jsonify, request
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
     print("Flask未安装，无法启动Web Dashboard")
 
 class WebServer:
-    def __init__(self, config_manager, system_monitor, oled_display):
+    def __init__(self, config_manager, system_monitor, displays, sampler, history=None, frame_scheduler=None, fleet_hub=None):
         self.config = config_manager
         self.system_monitor = system_monitor
-        self.oled_display = oled_display
+        self.displays = displays
+        self.sampler = sampler
+        self.history = history
+        self.frame_scheduler = frame_scheduler
+        self.fleet_hub = fleet_hub
         self.app: Optional[Flask] = None
         self.thread: Optional[threading.Thread] = None
+        self.server = None
         self.running = False
+        self.restart_lock = threading.Lock()
+        
+        # 状态接口与推送中心共用：每个快照只生成一次状态数据
+        self.status_cache = StatusCache(self.build_status)
+        # 推送中心挂在采样线程上，直接使用状态缓存中已序列化的响应
+        self.broadcaster = SnapshotBroadcaster(lambda snapshot: self.status_cache.get(snapshot).body)
+        # Prometheus 导出同样按采样周期渲染一次
+        self.metrics = MetricsExporter(system_monitor, displays, sampler, frame_scheduler)
         
         if FLASK_AVAILABLE and self.config.get('web_enabled', True):
             self.setup_flask()
+            self.sampler.add_listener(self.broadcaster.on_snapshot)
+            self.sampler.add_listener(self.metrics.on_snapshot)
+            self.config.subscribe(self.on_config_change, 'web_port', 'web_server')
+    
+    def build_status(self, snapshot) -> dict:
+        """由快照生成状态接口数据（原始数值，格式化由前端完成）"""
+        response = snapshot.data.to_dict()
+        response['uptime'] = self.system_monitor.get_uptime()
+        response['oled_connected'] = self.displays.is_connected if self.displays else False
+        response['oled_stats'] = self.displays.get_stats() if self.displays else None
+        response['scheduler_stats'] = self.frame_scheduler.get_stats() if self.frame_scheduler else None
+        return response
     
     def setup_flask(self):
         """设置Flask应用"""
-        self.app = Flask(__name__, static_folder='web', static_url_path='/static')
+        # 静态文件由内存缓存提供，不使用 Flask 的磁盘静态目录
+        self.app = Flask(__name__, static_folder=None)
+        self.assets = StaticAssets(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web'))
+        
+        @self.app.before_request
+        def start_timer():
+            if PERF.enabled:
+                g.perf_start = time.perf_counter()
+        
+        @self.app.after_request
+        def count_request(response):
+            self.metrics.count_request(request.endpoint, response.status_code)
+            start = g.get('perf_start')
+            if start is not None:
+                PERF.observe(f'http.{request.endpoint or "unknown"}', time.perf_counter() - start)
+            return response
+        
+        @self.app.route('/metrics')
+        def metrics():
+            return Response(self.metrics.exposition(), content_type=CONTENT_TYPE)
         
         @self.app.route('/')
         def index():
-            return send_from_directory('web', 'index.html')
+            return self.assets.respond('index.html', request.headers, Response)
         
         @self.app.route('/settings')
         def settings():
-            return send_from_directory('web', 'settings.html')
+            return self.assets.respond('settings.html', request.headers, Response)
+        
+        @self.app.route('/static/<path:filename>')
+        def static_asset(filename):
+            return self.assets.respond(filename, request.headers, Response)
         
         @self.app.route('/api/status')
         def api_status():
-            system_info = self.system_monitor.collect_system_info()
-            response = {
-                'time_str': system_info['time_str'],
-                'uptime': self.system_monitor.get_uptime(),
-                'oled_connected': self.oled_display.is_connected if self.oled_display else False,
-                'cpu_usage': system_info['cpu_usage'],
-                'cpu_freq': system_info['cpu_freq'],
-                'cpu_temp': system_info['cpu_temp'],
-                'mem_usage': system_info['mem_usage'],
-                'mem_used': system_info['mem_used'],
-                'mem_total': system_info['mem_total'],
-                'ip': system_info['ip'],
-                'network_name': system_info['network_name'],
-                'net_speed': system_info['net_speed']
-            }
-            return jsonify(response)
+            # 读取采样线程发布的最新快照，不触发采集；快照未变化时返回304，?since=<seq> 只返回变化字段
+            snapshot = self.sampler.latest()
+            if snapshot is None:
+                # 回放模式下第一条记录发布之前还没有快照
+                response = jsonify({'status': 'error', 'message': '尚无采样数据'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            entry = self.status_cache.get(snapshot)
+            headers = {'ETag': f'W/{entry.etag}', 'Cache-Control': 'no-cache'}
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match and etag_matches(if_none_match, (entry.etag,)):
+                return Response(status=304, headers=headers)
+            
+            body = entry.body
+            since = request.args.get('since', type=int)
+            if since is not None:
+                # 基准快照已过期时退回完整响应
+                body = self.status_cache.delta(snapshot, since) or body
+            return Response(body, headers=headers, content_type='application/json')
+        
+        @self.app.route('/api/stream')
+        def api_stream():
+            # 每个事件流长期占用一个工作线程，接受请求时即占用名额，超过上限时让前端退回轮询
+            subscription = self.broadcaster.subscribe(int(self.config.get('web_server.max_streams', 4)))
+            if subscription is None:
+                return jsonify({'status': 'error', 'message': '事件流连接数已达上限'}), 503
+            # 事件流不需要请求上下文；响应关闭时释放名额
+            response = Response(subscription, mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+        
+        @self.app.route('/api/history')
+        def api_history():
+            if not self.history:
+                return jsonify({'status': 'error', 'message': '历史记录未启用'}), 404
+            
+            metric = request.args.get('metric')
+            if not metric:
+                return jsonify({'metrics': self.history.metrics()})
+            
+            try:
+                now = time.time()
+                end = float(request.args.get('to', now))
+                start = float(request.args.get('from', end - 3600))
+                points = int(request.args.get('points', 300))
+            except ValueError:
+                return jsonify({'status': 'error', 'message': '参数格式错误'}), 400
+            points = max(1, min(points, 2000))
+            
+            result = self.history.query(metric, start, end, points)
+            if result is None:
+                return jsonify({'status': 'error', 'message': f'未知指标: {metric}',
+                                'metrics': self.history.metrics()}), 400
+            return jsonify(result)
+        
+        @self.app.route('/api/debug/perf')
+        def api_debug_perf():
+            return jsonify(PERF.snapshot())
+        
+        if self.fleet_hub:
+            @self.app.route('/fleet')
+            def fleet():
+                return self.assets.respond('fleet.html', request.headers, Response)
+            
+            @self.app.route('/api/fleet')
+            def api_fleet():
+                # 汇总JSON每轮拉取后生成一次，请求只返回缓存
+                return Response(self.fleet_hub.body, mimetype='application/json')
         
         @self.app.route('/api/config', methods=['GET', 'POST'])
         def api_config():
@@ -68,24 +178,96 @@ class WebServer:
                 except Exception as e:
                     return jsonify({'status': 'error', 'message': str(e)}), 500
     
+    def make_server(self, host: str, port: int):
+        """按 web_server 配置创建有界线程池服务器"""
+        workers = int(self.config.get('web_server.workers', 4))
+        return PooledWSGIServer(
+            host, port, self.app,
+            # 事件流各占一个线程，另外保留 workers 个线程处理普通请求
+            workers=workers + int(self.config.get('web_server.max_streams', 4)),
+            max_connections=self.config.get('web_server.max_connections', 64),
+            keepalive_timeout=self.config.get('web_server.keepalive_timeout', 15.0),
+            request_timeout=self.config.get('web_server.request_timeout', 10.0),
+            worker_nice=self.config.get('web_server.worker_nice', 5),
+        )
+    
     def start(self):
         """启动Web服务器"""
         if self.app and self.config.get('web_enabled', True) and not self.running:
+            port = self.config.get('web_port', 8080)
+            if self.config.get('web_server.production', True):
+                try:
+                    self.server = self.make_server('0.0.0.0', port)
+                except OSError as e:
+                    print(f"Web服务器无法监听端口 {port}: {e}")
+                    return
             self.running = True
-            self.thread = threading.Thread(target=self.run_server, daemon=True)
+            self.thread = threading.Thread(target=self.run_server, name="web-server", daemon=True)
+            self.thread.start()
+            print(f"Web服务器启动在 http://0.0.0.0:{port}")
+    
+    def on_config_change(self, changed):
+        """端口或服务器参数变化时重建服务器；回调可能来自请求线程，在单独的线程中进行"""
+        if not self.running:
+            return
+        if not self.server:
+            print("Web开发服务器无法重新监听，重启后生效")
+            return
+        threading.Thread(target=self.restart, name="web-restart", daemon=True).start()
+    
+    def restart(self):
+        """先监听新端口再停止旧服务器，新端口不可用时保留旧服务器"""
+        with self.restart_lock:
+            port = self.config.get('web_port', 8080)
+            old_server, old_thread = self.server, self.thread
+            if old_server is None:
+                return
+            if port != old_server.server_port:
+                try:
+                    server = self.make_server('0.0.0.0', port)
+                except OSError as e:
+                    print(f"Web服务器无法监听端口 {port}，保持原端口: {e}")
+                    return
+                self.broadcaster.disconnect_all()
+                old_server.shutdown()
+            else:
+                self.broadcaster.disconnect_all()
+                old_server.shutdown()
+                if old_thread:
+                    old_thread.join(timeout=5)
+                try:
+                    server = self.make_server('0.0.0.0', port)
+                except OSError as e:
+                    print(f"Web服务器无法重新监听端口 {port}: {e}")
+                    self.server = None
+                    self.running = False
+                    return
+            self.server = server
+            self.thread = threading.Thread(target=self.run_server, name="web-server", daemon=True)
             self.thread.start()
-            print(f"Web服务器启动在 http://0.0.0.0:{self.config.get('web_port', 8080)}")
+            print(f"Web服务器已按新配置重启在 http://0.0.0.0:{port}")
     
     def run_server(self):
         """运行Web服务器"""
-        if self.app:
+        if self.server:
+            self.server.serve_forever()
+        elif self.app:
+            # 开发模式（web_server.production 为 false）
             self.app.run(
                 host='0.0.0.0', 
                 port=self.config.get('web_port', 8080), 
                 debug=False, 
-                use_reloader=False
+                use_reloader=False,
+                threaded=True
             )
     
     def stop(self):
-        """停止Web服务器"""
-        self.running = False
\ No newline at end of file
+        """停止Web服务器：先结束事件流，再等待进行中的请求完成"""
+        self.running = False
+        self.broadcaster.close()
+        if self.server:
+            self.server.shutdown()
+            if self.thread:
+                self.thread.join(timeout=5)
+                self.thread = None
+            self.server = None
@@ -0,0 +1,422 @@
+import io
+import os
+import queue
+import selectors
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+
+class _WSGIHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 WSGI请求处理：每次只处理一个请求，有长度的响应保持连接，无长度的响应使用分块编码"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "oled-monitor"
+
+    def setup(self):
+        # 读取请求头/发送响应的超时，慢客户端不能长期占用工作线程
+        self.connection = self.request
+        self.connection.settimeout(self.server.request_timeout)
+        # 读缓冲随连接保留：上一个请求之后已读入缓冲的数据（管线化或紧接着发送的请求）不会丢失
+        self.rfile = self.server.reader(self.connection)
+        self.wfile = socketserver._SocketWriter(self.connection)
+
+    def finish(self):
+        # 只关闭写端包装，读缓冲在连接关闭时由服务器释放
+        try:
+            self.wfile.flush()
+        except OSError:
+            pass
+        self.wfile.close()
+
+    def handle(self):
+        try:
+            self.handle_one_request()
+        except (ConnectionError, socket.timeout):
+            self.close_connection = True
+
+    def log_request(self, code="-", size="-"):
+        # 不记录访问日志，错误仍由 log_error 输出
+        pass
+
+    def make_environ(self, body: "_RequestBody") -> dict:
+        path, _, query = self.path.partition('?')
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote_to_bytes(path).decode('latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.server.server_name,
+            'SERVER_PORT': str(self.server.server_port),
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0],
+            'REMOTE_PORT': str(self.client_address[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for key, value in self.headers.items():
+            key = key.upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_' + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def run_wsgi(self):
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self.send_error(411)
+            self.close_connection = True
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self.send_error(400)
+            self.close_connection = True
+            return
+        body = _RequestBody(self.rfile, length)
+
+        response = {}
+        sent = {'headers': False, 'chunked': False}
+
+        def send_headers():
+            status, headers = response['status'], response['headers']
+            code, _, reason = status.partition(' ')
+            code = int(code)
+            self.send_response(code, reason)
+            keys = set()
+            for key, value in headers:
+                self.send_header(key, value)
+                keys.add(key.lower())
+            if 'content-length' not in keys and self.command != 'HEAD' \
+                    and code not in (204, 304) and not 100 <= code < 200:
+                if self.request_version >= 'HTTP/1.1':
+                    sent['chunked'] = True
+                    self.send_header('Transfer-Encoding', 'chunked')
+                else:
+                    self.close_connection = True
+            if self.close_connection:
+                self.send_header('Connection', 'close')
+            elif self.request_version < 'HTTP/1.1':
+                self.send_header('Connection', 'keep-alive')
+            self.end_headers()
+            sent['headers'] = True
+
+        def write(data: bytes):
+            if not sent['headers']:
+                send_headers()
+            if not data or self.command == 'HEAD':
+                return
+            if sent['chunked']:
+                data = b'%x\r\n%s\r\n' % (len(data), data)
+            self.wfile.write(data)
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and sent['headers']:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'], response['headers'] = status, headers
+            return write
+
+        try:
+            result = self.server.app(self.make_environ(body), start_response)
+            try:
+                for data in result:
+                    write(data)
+                if not sent['headers']:
+                    send_headers()
+                if sent['chunked']:
+                    self.wfile.write(b'0\r\n\r\n')
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except (ConnectionError, socket.timeout):
+            self.close_connection = True
+            return
+        except Exception:
+            self.close_connection = True
+            if not sent['headers']:
+                self.send_error(500)
+            raise
+
+        # 读完应用未读取的请求体，下一个请求才能从正确位置开始解析
+        if not body.drain():
+            self.close_connection = True
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = run_wsgi
+
+
+class _RequestBody:
+    """按 Content-Length 限定的请求体"""
+
+    # 超过该长度的未读请求体不再读取，直接关闭连接
+    MAX_DRAIN = 65536
+
+    def __init__(self, rfile, length: int):
+        self.rfile = rfile
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.readline(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        while self.remaining:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def drain(self) -> bool:
+        """丢弃剩余请求体，过大时返回False"""
+        if self.remaining > self.MAX_DRAIN:
+            return False
+        while self.remaining:
+            if not self.read(self.remaining):
+                return False
+        return True
+
+
+class PooledWSGIServer(socketserver.TCPServer):
+    """有界工作线程池的WSGI服务器：支持HTTP/1.1长连接（管线化请求依次处理），未发送请求的连接停放在selector中不占用线程"""
+
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, host: str, port: int, app, workers: int = 4, max_connections: int = 64,
+                 keepalive_timeout: float = 15.0, request_timeout: float = 10.0, worker_nice: int = 0):
+        self.workers = max(1, int(workers))
+        self.max_connections = max(1, int(max_connections))
+        self.keepalive_timeout = float(keepalive_timeout)
+        self.request_timeout = float(request_timeout)
+        self.worker_nice = int(worker_nice)
+        self.app = app
+        super().__init__((host, port), _WSGIHandler)
+        self.server_name = socket.gethostname()
+        self.server_port = self.server_address[1]
+
+        self.tasks: "queue.Queue[Optional[Tuple[socket.socket, tuple]]]" = queue.Queue()
+        self.selector = selectors.DefaultSelector()
+        # 停放中的连接（新连接与空闲长连接） -> (客户端地址, 过期时间)
+        self.parked: Dict[socket.socket, Tuple[tuple, float]] = {}
+        # 连接 -> 读缓冲，跨请求保留
+        self.readers: Dict[socket.socket, io.BufferedReader] = {}
+        # 工作线程处理完、等待重新停放的连接
+        self.returned: List[Tuple[socket.socket, tuple]] = []
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+        self.requests = 0
+        self.rejected = 0
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\x00')
+        except (BlockingIOError, OSError):
+            pass
+
+    def serve_forever(self, poll_interval: float = 1.0):
+        """接收连接并把有数据可读的连接分配给工作线程，直到 shutdown()"""
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"web-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        self.socket.setblocking(False)
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+        try:
+            while self.running:
+                for key, _ in self.selector.select(poll_interval):
+                    sock = key.fileobj
+                    if sock is self.socket:
+                        self._accept()
+                    elif sock is self._wake_r:
+                        self._drain_wake()
+                    else:
+                        self.selector.unregister(sock)
+                        address, _ = self.parked.pop(sock)
+                        self.tasks.put((sock, address))
+                self._expire_idle()
+        finally:
+            self._close_all()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, address = self.socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            with self.lock:
+                accepted = self.connections < self.max_connections
+                if accepted:
+                    self.connections += 1
+                else:
+                    self.rejected += 1
+            if not accepted:
+                self._close(conn)
+                continue
+            conn.setblocking(True)
+            # 响应头和响应体分开写入，长连接上需要关闭Nagle避免与延迟确认叠加
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # 新连接同样先停放，收到数据后才交给工作线程；预连接或迟迟不发请求的连接不占用线程，
+            # request_timeout 内没有请求时关闭
+            try:
+                self.selector.register(conn, selectors.EVENT_READ)
+                self.parked[conn] = (address, time.monotonic() + self.request_timeout)
+            except (ValueError, OSError):
+                self._release(conn)
+
+    def _drain_wake(self):
+        try:
+            while self._wake_r.recv(256):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        with self.lock:
+            returned, self.returned = self.returned, []
+        deadline = time.monotonic() + self.keepalive_timeout
+        for conn, address in returned:
+            try:
+                self.selector.register(conn, selectors.EVENT_READ)
+                self.parked[conn] = (address, deadline)
+            except (ValueError, OSError):
+                self._release(conn)
+
+    def _expire_idle(self):
+        """关闭超过 keepalive_timeout（新连接为 request_timeout）未发送请求的连接"""
+        now = time.monotonic()
+        expired = [conn for conn, (_, deadline) in self.parked.items() if now >= deadline]
+        for conn in expired:
+            self.selector.unregister(conn)
+            del self.parked[conn]
+            self._release(conn)
+
+    def _worker(self):
+        if self.worker_nice:
+            # 降低工作线程优先级，网页请求不与OLED主循环争抢CPU
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.worker_nice)
+            except (AttributeError, OSError):
+                pass
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            conn, address = task
+            keep = False
+            try:
+                handler = self.RequestHandlerClass(conn, address, self)
+                with self.lock:
+                    self.requests += 1
+                keep = not handler.close_connection and self.running
+            except Exception:
+                self.handle_error(conn, address)
+            if keep and self._has_buffered(conn):
+                # 缓冲中已有下一个请求，socket 不会再变为可读，直接继续处理
+                self.tasks.put((conn, address))
+            elif keep:
+                with self.lock:
+                    self.returned.append((conn, address))
+                self._wake()
+            else:
+                self._release(conn)
+
+    def reader(self, conn: socket.socket) -> io.BufferedReader:
+        """连接的读缓冲，首次请求时创建"""
+        with self.lock:
+            reader = self.readers.get(conn)
+            if reader is None:
+                reader = self.readers[conn] = conn.makefile('rb')
+            return reader
+
+    def _has_buffered(self, conn: socket.socket) -> bool:
+        """读缓冲中是否已有数据（非阻塞检查）"""
+        with self.lock:
+            reader = self.readers.get(conn)
+        if reader is None:
+            return False
+        try:
+            conn.setblocking(False)
+            try:
+                return bool(reader.peek(1))
+            finally:
+                conn.setblocking(True)
+        except OSError:
+            return False
+
+    def _close(self, conn: socket.socket):
+        with self.lock:
+            reader = self.readers.pop(conn, None)
+        if reader is not None:
+            reader.close()
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+
+    def _release(self, conn: socket.socket):
+        self._close(conn)
+        with self.lock:
+            self.connections -= 1
+
+    def _close_all(self):
+        """停止工作线程并关闭所有连接"""
+        for _ in self.threads:
+            self.tasks.put(None)
+        deadline = time.monotonic() + 2.0
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self.threads = []
+        for conn in list(self.parked):
+            self._close(conn)
+        self.parked.clear()
+        with self.lock:
+            returned, self.returned = self.returned, []
+        for conn, _ in returned:
+            self._close(conn)
+        self.selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+        self.server_close()
+
+    def shutdown(self):
+        """停止接收新请求；进行中的请求最多等待2秒"""
+        self.running = False
+        self._wake()
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'connections': self.connections,
+            'idle_connections': len(self.parked),
+            'queued': self.tasks.qsize(),
+            'requests': self.requests,
+            'rejected': self.rejected,
+        }